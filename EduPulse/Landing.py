@@ -1,11 +1,14 @@
 import streamlit as st
 from utils import load_css
+from metrics import finish_page_timer, start_page_timer
 import random
 
 
 
 
 
+start_page_timer("landing")
+
 # Page config
 st.set_page_config(
     page_title="EduNexus 2.0 🚀",
@@ -203,3 +206,5 @@ with col3:
 #         unsafe_allow_html=True
 #     )            
 # Team Section
+
+finish_page_timer()
@@ -0,0 +1,271 @@
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from llm_cache import make_cache_key
+
+# Words the mock backend builds its answers from
+_WORDS = (
+    "learning concept example energy system process student practice theory model "
+    "function data structure method result analysis review step idea question answer "
+    "knowledge skill lesson chapter topic detail summary point key important simple "
+    "clear study plan code value change reason effect cause review test memory focus"
+).split()
+
+def _result(text, input_tokens, output_tokens, stop_reason):
+    """One entry of the results list in a WatsonX response"""
+    return {
+        "generated_text": text,
+        "generated_token_count": output_tokens,
+        "input_token_count": input_tokens,
+        "stop_reason": stop_reason
+    }
+
+class MockBackend:
+    """Deterministic local stand-in for the WatsonX model, for benchmarks and offline runs.
+
+    It offers the same generate and generate_text_stream calls as ModelInference
+    and answers in WatsonX's response format. The same prompt and parameters
+    always give the same text. Each call waits `latency` seconds before the first
+    token and then produces `tokens_per_second` tokens per second (0 means instant).
+    """
+
+    def __init__(self, latency=0.2, tokens_per_second=50.0, output_tokens=200):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+
+    def _tokens(self, prompt, params):
+        """The answer split into word tokens, and whether it was cut off at max_new_tokens"""
+        params = params or {}
+        limit = params.get('max_new_tokens', self.output_tokens)
+        seed = hashlib.sha256(f"{prompt}|{sorted(params.items())}".encode('utf-8')).digest()
+        rng = random.Random(seed)
+        words = []
+        while len(words) < self.output_tokens:
+            sentence = [rng.choice(_WORDS) for _ in range(rng.randint(6, 14))]
+            sentence[0] = sentence[0].capitalize()
+            sentence[-1] += "." if rng.random() > 0.25 else ".\n\n"
+            words.extend(sentence)
+        text = " ".join(words[:min(limit, self.output_tokens)]).replace("\n\n ", "\n\n").strip()
+        return re.findall(r'\S+\s*', text), limit < self.output_tokens
+
+    def _wait_for(self, token_count):
+        if self.tokens_per_second > 0:
+            time.sleep(token_count / self.tokens_per_second)
+
+    def generate(self, prompt, params=None, **kwargs):
+        """Return a complete answer shaped like ModelInference.generate"""
+        tokens, truncated = self._tokens(prompt, params)
+        time.sleep(self.latency)
+        self._wait_for(len(tokens))
+        return {
+            "model_id": "mock",
+            "results": [_result(
+                "".join(tokens), (len(prompt) + 3) // 4, len(tokens), "max_tokens" if truncated else "eos_token"
+            )]
+        }
+
+    def generate_text_stream(self, prompt, params=None, raw_response=False, **kwargs):
+        """Yield an answer a few tokens at a time, like ModelInference.generate_text_stream"""
+        tokens, truncated = self._tokens(prompt, params)
+        time.sleep(self.latency)
+        input_tokens = (len(prompt) + 3) // 4
+        for start in range(0, len(tokens), 4):
+            chunk = tokens[start:start + 4]
+            self._wait_for(len(chunk))
+            text = "".join(chunk)
+            if not raw_response:
+                yield text
+                continue
+            last = start + 4 >= len(tokens)
+            yield {
+                "model_id": "mock",
+                "results": [_result(
+                    text,
+                    input_tokens if start == 0 else 0,
+                    min(start + 4, len(tokens)),
+                    ("max_tokens" if truncated else "eos_token") if last else "not_finished"
+                )]
+            }
+
+def mock_backend_from_env():
+    """Build the mock backend from EDUPULSE_MOCK_* environment variables"""
+    return MockBackend(
+        latency=float(os.getenv('EDUPULSE_MOCK_LATENCY', '0.2')),
+        tokens_per_second=float(os.getenv('EDUPULSE_MOCK_TOKENS_PER_SECOND', '50')),
+        output_tokens=int(os.getenv('EDUPULSE_MOCK_OUTPUT_TOKENS', '200'))
+    )
+
+def _fixture_key(prompt, params):
+    return make_cache_key("fixture", params or {}, prompt)[:32]
+
+class RecordingBackend:
+    """Wrap another backend and append every request it serves to a fixture file.
+
+    The fixture is gzipped JSON lines with one compact record per request: the
+    hash of the prompt and parameters, token counts, the response text and its
+    timing (time of each chunk for streams, total duration otherwise). Prompts
+    themselves are not stored. Each record is written as its own gzip member, so
+    the file stays readable if the server stops mid-run.
+    """
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + "\n"
+        with self._lock:
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+
+    def _record(self, prompt, params, text, input_tokens, output_tokens, stop_reason, started_at, times, lengths=None):
+        record = {
+            "k": _fixture_key(prompt, params),
+            "n": (params or {}).get('max_new_tokens'),
+            "i": input_tokens,
+            "o": output_tokens,
+            "s": stop_reason,
+            "t": times,
+            "r": text,
+            "at": round(started_at)
+        }
+        if lengths is not None:
+            record["c"] = lengths
+        try:
+            self._write(record)
+        except OSError:
+            pass
+
+    def generate(self, prompt, params=None, **kwargs):
+        started_at, started = time.time(), time.perf_counter()
+        response = self.backend.generate(prompt, params=params, **kwargs)
+        result = (response.get('results') or [{}])[0]
+        self._record(
+            prompt, params, result.get('generated_text', ''), result.get('input_token_count'),
+            result.get('generated_token_count'), result.get('stop_reason'), started_at,
+            [round((time.perf_counter() - started) * 1000)]
+        )
+        return response
+
+    def generate_text_stream(self, prompt, params=None, raw_response=False, **kwargs):
+        started_at, started = time.time(), time.perf_counter()
+        texts, times = [], []
+        input_tokens = output_tokens = stop_reason = None
+        for event in self.backend.generate_text_stream(prompt, params=params, raw_response=raw_response, **kwargs):
+            results = event.get('results', []) if raw_response else [{"generated_text": event}]
+            for result in results:
+                # WatsonX sends the prompt token count with the first event only
+                input_tokens = max(input_tokens or 0, result.get('input_token_count') or 0)
+                output_tokens = result.get('generated_token_count') or output_tokens
+                stop_reason = result.get('stop_reason') or stop_reason
+                if result.get('generated_text'):
+                    texts.append(result['generated_text'])
+                    times.append(round((time.perf_counter() - started) * 1000))
+            yield event
+        # Only complete streams are recorded
+        self._record(
+            prompt, params, "".join(texts), input_tokens, output_tokens, stop_reason, started_at,
+            times, [len(text) for text in texts]
+        )
+
+class ReplayBackend:
+    """Serve responses from a fixture written by RecordingBackend, with the recorded timing.
+
+    `speed` scales the recorded delays: 1 replays them as recorded, 0.5 at half
+    the delay, 0 instantly. A request that was not recorded gets the recording
+    with the closest prompt size and the same output limit, so traffic with new
+    prompts still has realistic response sizes; with `strict` it fails instead.
+    """
+
+    def __init__(self, path, speed=1.0, strict=False):
+        self.speed = speed
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._records = {}
+        self._by_limit = {}
+        self._next = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+            except EOFError:
+                # A recording cut off mid-write; keep what was complete
+                pass
+        if not self._records:
+            raise ValueError(f"No recordings found in {path}")
+
+    def _add(self, record):
+        self._records.setdefault(record["k"], []).append(record)
+        self._by_limit.setdefault(record.get("n"), []).append(record)
+
+    def _find(self, prompt, params):
+        key = _fixture_key(prompt, params)
+        with self._lock:
+            if key in self._records:
+                # Repeated requests cycle through their recordings in order
+                records = self._records[key]
+                index = self._next.get(key, 0)
+                self._next[key] = index + 1
+                return records[index % len(records)]
+        if self.strict:
+            raise LookupError("No recorded response for this request")
+        prompt_tokens = (len(prompt) + 3) // 4
+        candidates = self._by_limit.get((params or {}).get('max_new_tokens')) or [
+            record for records in self._records.values() for record in records
+        ]
+        return min(candidates, key=lambda record: abs((record.get("i") or 0) - prompt_tokens))
+
+    def _wait_until(self, started, milliseconds):
+        delay = started + milliseconds * self.speed / 1000 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def generate(self, prompt, params=None, **kwargs):
+        started = time.perf_counter()
+        record = self._find(prompt, params)
+        self._wait_until(started, record["t"][-1] if record["t"] else 0)
+        return {
+            "model_id": "replay",
+            "results": [_result(record["r"], record.get("i"), record.get("o"), record.get("s"))]
+        }
+
+    def generate_text_stream(self, prompt, params=None, raw_response=False, **kwargs):
+        started = time.perf_counter()
+        record = self._find(prompt, params)
+        lengths = record.get("c") or [len(record["r"])]
+        times = record["t"] if record.get("c") else record["t"][-1:] or [0]
+        offset = 0
+        for index, (length, milliseconds) in enumerate(zip(lengths, times)):
+            self._wait_until(started, milliseconds)
+            text = record["r"][offset:offset + length]
+            offset += length
+            if not raw_response:
+                yield text
+                continue
+            last = index == len(lengths) - 1
+            yield {
+                "model_id": "replay",
+                "results": [_result(
+                    text,
+                    record.get("i") if index == 0 else 0,
+                    record.get("o") if last else None,
+                    record.get("s") if last else "not_finished"
+                )]
+            }
+
+def replay_backend_from_env():
+    """Build the replay backend from EDUPULSE_REPLAY_* environment variables"""
+    return ReplayBackend(
+        os.environ['EDUPULSE_REPLAY_PATH'],
+        speed=float(os.getenv('EDUPULSE_REPLAY_SPEED', '1')),
+        strict=os.getenv('EDUPULSE_REPLAY_STRICT', '0') == '1'
+    )
@@ -0,0 +1,281 @@
+"""Classroom load test: many simulated student sessions using the pages at once.
+
+Every session is a thread that works through the page scenarios of
+page_benchmark.py with its own session state, just like a browser tab. All
+sessions share the app's caches, clients and limiters, as they would inside one
+Streamlit server process. The model is the local mock backend, or responses
+recorded with EDUPULSE_RECORD_PATH when --replay is given.
+
+    python benchmarks/load_test.py --sessions 300 --ramp-seconds 60
+    python benchmarks/load_test.py --sessions 50 --only "q&a" --iterations 5
+    python benchmarks/load_test.py --sessions 300 --replay traffic.jsonl.gz --replay-speed 0.5
+
+CPU and memory are measured for the whole process, so they include the test
+harness (AppTest parses every page render) as well as the app itself.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+
+from page_benchmark import SCENARIOS, configure_environment, disable_rerun, fill_inputs, seed_transcript, APP_DIR
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=30, help="number of concurrent student sessions")
+    parser.add_argument("--ramp-seconds", type=float, default=10, help="spread session starts over this many seconds")
+    parser.add_argument("--iterations", type=int, default=3, help="page interactions per session")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean pause between interactions in seconds")
+    parser.add_argument("--latency", type=float, default=0.5, help="mock time to first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="mock generation speed, 0 for instant")
+    parser.add_argument("--output-tokens", type=int, default=200, help="mock answer length in tokens")
+    parser.add_argument("--replay", help="serve recorded responses from this fixture instead of the mock backend")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="scale recorded delays, 0 for instant")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--only", help="use only scenarios whose name contains this text")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before one page run is counted as failed")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the scenario order and think times")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args()
+
+def make_app_test_thread_safe():
+    """Let AppTest run on many threads at once.
+
+    AppTest installs and removes a mock Runtime around every run, and resolves
+    the page to run through a process-wide pages cache. With runs on several
+    threads, one run would remove the Runtime under another or run another
+    session's page. Fall back to a shared Runtime and cache pages per script.
+    Every AppTest also runs under the same session ID, so each simulated
+    student gets its own for the scheduler to tell them apart.
+    """
+    from unittest.mock import MagicMock
+    from streamlit import source_util
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or shared)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    get_pages = source_util.get_pages
+    pages_by_script = {}
+
+    def get_pages_of(main_script_path):
+        with source_util._pages_cache_lock:
+            if main_script_path not in pages_by_script:
+                source_util._cached_pages = None
+                pages_by_script[main_script_path] = get_pages(main_script_path)
+            return pages_by_script[main_script_path]
+
+    source_util.get_pages = get_pages_of
+
+    init_script_runner = LocalScriptRunner.__init__
+
+    def init_with_session_id(self, *args, **kwargs):
+        init_script_runner(self, *args, **kwargs)
+        self._session_id = threading.current_thread().name
+
+    LocalScriptRunner.__init__ = init_with_session_id
+
+def rss_bytes():
+    """Current resident memory of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak instead of current where /proc is unavailable (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(values, q):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+class Session(threading.Thread):
+    """One simulated student going through a few pages"""
+
+    def __init__(self, number, scenarios, args, results, start_delay):
+        super().__init__(name=f"session-{number}", daemon=True)
+        self.number = number
+        self.scenarios = scenarios
+        self.args = args
+        self.results = results
+        self.start_delay = start_delay
+        self.rng = random.Random(args.seed * 100003 + number)
+        self.apps = {}
+
+    def interact(self, scenario):
+        from streamlit.testing.v1 import AppTest
+
+        app = self.apps.get(scenario["page"])
+        started = time.perf_counter()
+        if app is None:
+            app = AppTest.from_file(os.path.join(APP_DIR, scenario["page"]), default_timeout=self.args.timeout)
+            self.apps[scenario["page"]] = app
+        app.run()
+        rerun = time.perf_counter() - started
+
+        action = None
+        if scenario.get("button"):
+            # Each student asks something slightly different, so answers are not all shared
+            inputs = {
+                label: value if "://" in value else f"{value} (student {self.number})"
+                for label, value in scenario.get("inputs", {}).items()
+            }
+            fill_inputs(app, inputs)
+            app.run()
+            buttons = [button for button in app.button if button.label == scenario["button"]]
+            if not buttons:
+                return rerun, None, [f"Button {scenario['button']} not found"] + [
+                    str(exception.value) for exception in app.exception
+                ]
+            started = time.perf_counter()
+            buttons[0].click().run()
+            action = time.perf_counter() - started
+        return rerun, action, [str(exception.value) for exception in app.exception]
+
+    def run(self):
+        time.sleep(self.start_delay)
+        for iteration in range(self.args.iterations):
+            scenario = self.scenarios[(self.number + iteration) % len(self.scenarios)]
+            try:
+                rerun, action, errors = self.interact(scenario)
+            except Exception as e:
+                rerun, action, errors = None, None, [repr(e)]
+            self.results.append({
+                "session": self.number,
+                "scenario": scenario["name"],
+                "rerun_s": rerun,
+                "action_s": action,
+                "errors": errors
+            })
+            if self.args.think_time:
+                time.sleep(self.rng.expovariate(1 / self.args.think_time))
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "p50_s": percentile(values, 50),
+        "p95_s": percentile(values, 95),
+        "p99_s": percentile(values, 99),
+        "max_s": max(values) if values else None
+    }
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+def print_report(report):
+    print(f"sessions            {report['sessions']}")
+    print(f"interactions        {report['interactions']} ({report['failed']} failed)")
+    print(f"wall time           {report['wall_s']:.1f}s")
+    print(f"throughput          {report['throughput_per_s']:.2f} interactions/s")
+    print(f"CPU                 {report['cpu_s']:.1f}s ({report['cpu_cores']:.2f} cores on average)")
+    print(f"memory              {report['rss_start_mb']:.0f} MB -> {report['rss_end_mb']:.0f} MB, "
+          f"{report['rss_per_session_kb']:.0f} KB per session")
+    print()
+    header = f"{'latency':<22} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, summary in [("page rerun", report["rerun"]), ("model action", report["action"])] + [
+        (f"  {name}", summary) for name, summary in report["scenarios"].items()
+    ]:
+        print(f"{name:<22} {summary['count']:>6} {format_seconds(summary['p50_s']):>8} "
+              f"{format_seconds(summary['p95_s']):>8} {format_seconds(summary['p99_s']):>8} "
+              f"{format_seconds(summary['max_s']):>8}")
+    print()
+    for name, stats in report["app"].items():
+        print(f"{name:<20}{stats}")
+    for error, count in report["errors"].items():
+        print(f"error x{count}: {error}")
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    seed_transcript()
+    disable_rerun()
+    make_app_test_thread_safe()
+
+    from utils import get_cache_stats, get_coalescing_stats, get_profile_usage
+    from resilience import get_resilience_stats
+
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if scenario.get("button") and (not args.only or args.only.lower() in scenario["name"].lower())
+    ]
+    if not scenarios:
+        print("No scenarios selected")
+        return 1
+
+    results = []
+    rss_start = rss_bytes()
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    sessions = [
+        Session(number, scenarios, args, results, args.ramp_seconds * number / max(1, args.sessions))
+        for number in range(args.sessions)
+    ]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_start
+    rss_end = rss_bytes()
+
+    failed = [result for result in results if result["errors"]]
+    errors = {}
+    for result in failed:
+        for error in result["errors"]:
+            errors[error[:200]] = errors.get(error[:200], 0) + 1
+
+    report = {
+        "settings": vars(args),
+        "sessions": args.sessions,
+        "interactions": len(results),
+        "failed": len(failed),
+        "wall_s": wall,
+        "throughput_per_s": len(results) / wall if wall else 0.0,
+        "cpu_s": cpu,
+        "cpu_cores": cpu / wall if wall else 0.0,
+        "rss_start_mb": rss_start / 2**20,
+        "rss_end_mb": rss_end / 2**20,
+        "rss_per_session_kb": (rss_end - rss_start) / 1024 / max(1, args.sessions),
+        "rerun": latency_summary([result["rerun_s"] for result in results if result["rerun_s"] is not None]),
+        "action": latency_summary([result["action_s"] for result in results if result["action_s"] is not None]),
+        "scenarios": {
+            scenario["name"]: latency_summary([
+                result["action_s"] for result in results
+                if result["scenario"] == scenario["name"] and result["action_s"] is not None
+            ])
+            for scenario in scenarios
+        },
+        "app": {
+            "cache": get_cache_stats(),
+            "coalescing": get_coalescing_stats(),
+            "upstream": get_resilience_stats(),
+            "model calls": sum(usage["calls"] for usage in get_profile_usage().values())
+        },
+        "errors": errors
+    }
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""End-to-end benchmark of every page against the local mock model backend.
+
+Each scenario opens a page in Streamlit's AppTest, fills in its inputs and
+clicks its main button. No network or WatsonX credentials are needed.
+
+    python benchmarks/page_benchmark.py --runs 5
+    python benchmarks/page_benchmark.py --latency 0 --tokens-per-second 0   # app overhead only
+    python benchmarks/page_benchmark.py --replay traffic.jsonl.gz           # recorded responses
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lecture used by the Lecture Summaries scenario; its transcript is generated locally
+VIDEO_ID = "bench000001"
+
+LONG_DOCUMENT = " ".join(
+    f"Paragraph {i} explains how energy moves through an ecosystem, from producers "
+    f"to consumers and decomposers, with examples from forests and oceans.\n\n"
+    for i in range(400)
+)
+
+SCENARIOS = [
+    {"name": "Landing", "page": "Landing.py"},
+    {
+        "name": "Learning Assistant",
+        "page": "pages/1_🎓_Personalized_Learning_Assistant.py",
+        "inputs": {"Type your question or use a template:": "Explain how photosynthesis works."},
+        "button": "🚀 Get Help"
+    },
+    {
+        "name": "Coding Mentor",
+        "page": "pages/2_💻_AI_Coding_Mentor.py",
+        "inputs": {"Enter your code or description:": "def add(a, b):\n    return a + b\n\nprint(add(2, 3))"},
+        "button": "🔍 Review Code"
+    },
+    {
+        "name": "Summarizer",
+        "page": "pages/3_📝_Smart_Document_Summarizer.py",
+        "inputs": {"Paste your document text here:": LONG_DOCUMENT[:3000]},
+        "button": "🚀 Generate Summary"
+    },
+    {
+        "name": "Summarizer (long)",
+        "page": "pages/3_📝_Smart_Document_Summarizer.py",
+        "inputs": {"Paste your document text here:": LONG_DOCUMENT},
+        "button": "🚀 Generate Summary"
+    },
+    {
+        "name": "Study Planner",
+        "page": "pages/4_📅_Interactive_Study_Planner.py",
+        "inputs": {"Subject/Topic": "Physics", "Learning Goals": "Understand classical mechanics."},
+        "button": "Generate Study Plan"
+    },
+    {
+        "name": "Real-Time Q&A",
+        "page": "pages/5_❓_Real_Time_QA.py",
+        "inputs": {"Your Question": "What is the difference between mitosis and meiosis?"},
+        "button": "🤔 Get Answer"
+    },
+    {
+        "name": "Mental Health",
+        "page": "pages/6_🧠_Mental_Health.py",
+        "button": "Get Personalized Support"
+    },
+    {
+        "name": "Multi-Language",
+        "page": "pages/7_🌍_Multi_Language_Support.py",
+        "inputs": {"Enter your question in English": "What causes the seasons on Earth?"},
+        "button": "Get Answer"
+    },
+    {
+        "name": "Study Resources",
+        "page": "pages/8_📚_AI_Study_Resources.py",
+        "inputs": {"Subject/Topic": "Biology", "Specific Topics to Cover": "cells, genetics"},
+        "button": "Generate Study Resource"
+    },
+    {
+        "name": "Lecture Summaries",
+        "page": "pages/9_📹_Lecture_Summaries.py",
+        "inputs": {"📺 YouTube Video URL": f"https://www.youtube.com/watch?v={VIDEO_ID}"},
+        "button": "📝 Generate Summary"
+    }
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="runs per scenario (median is reported)")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock time to first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="mock generation speed, 0 for instant")
+    parser.add_argument("--output-tokens", type=int, default=200, help="mock answer length in tokens")
+    parser.add_argument("--replay", help="serve recorded responses from this fixture instead of the mock backend")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="scale recorded delays, 0 for instant")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--only", help="run only scenarios whose name contains this text")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args()
+
+def configure_environment(args):
+    """Point the app at the mock or replay backend and a throwaway cache directory"""
+    if args.replay:
+        os.environ["EDUPULSE_LLM_BACKEND"] = "replay"
+        os.environ["EDUPULSE_REPLAY_PATH"] = os.path.abspath(args.replay)
+        os.environ["EDUPULSE_REPLAY_SPEED"] = str(args.replay_speed)
+    else:
+        os.environ["EDUPULSE_LLM_BACKEND"] = "mock"
+    os.environ["EDUPULSE_MOCK_LATENCY"] = str(args.latency)
+    os.environ["EDUPULSE_MOCK_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["EDUPULSE_MOCK_OUTPUT_TOKENS"] = str(args.output_tokens)
+    os.environ["EDUPULSE_LLM_CACHE"] = "1" if args.cache else "0"
+    os.environ["EDUPULSE_CACHE_DIR"] = tempfile.mkdtemp(prefix="edupulse-bench-")
+    if not args.cache:
+        # Every run should reach the model, not an earlier answer
+        os.environ["EDUPULSE_QA_SIMILARITY"] = "2"
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+
+def seed_transcript():
+    """Put a 50-minute synthetic lecture in the transcript cache"""
+    import transcripts
+    rng = random.Random(0)
+    words = "force mass energy motion velocity law equation example system particle".split()
+    segments = [
+        {"text": " ".join(rng.choice(words) for _ in range(12)), "start": i * 5.0, "duration": 5.0}
+        for i in range(600)
+    ]
+    with transcripts._lock:
+        transcripts._remember(VIDEO_ID, segments)
+
+def total_usage():
+    from utils import get_profile_usage
+    usage = get_profile_usage().values()
+    return {
+        "calls": sum(item["calls"] for item in usage),
+        "input_tokens": sum(item["input_tokens"] for item in usage),
+        "output_tokens": sum(item["output_tokens"] for item in usage)
+    }
+
+def fill_inputs(app, inputs):
+    for widget in list(app.text_area) + list(app.text_input):
+        if widget.label in inputs:
+            widget.input(inputs[widget.label])
+
+def disable_rerun():
+    """AppTest (Streamlit 1.32) never finishes a script run that calls st.rerun,
+    so pages that rerun after answering are measured without that extra rerun"""
+    import streamlit
+    streamlit.rerun = lambda: None
+
+def run_scenario(scenario):
+    """Run one scenario once and return its timings and token counts"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(APP_DIR, scenario["page"]), default_timeout=300)
+    started = time.perf_counter()
+    app.run()
+    result = {"render_s": time.perf_counter() - started, "end_to_end_s": None}
+
+    if scenario.get("button"):
+        fill_inputs(app, scenario.get("inputs", {}))
+        started = time.perf_counter()
+        app.run()
+        result["input_rerun_s"] = time.perf_counter() - started
+
+        before = total_usage()
+        button = next(button for button in app.button if button.label == scenario["button"])
+        started = time.perf_counter()
+        button.click().run()
+        result["end_to_end_s"] = time.perf_counter() - started
+        after = total_usage()
+        result.update({key: after[key] - before[key] for key in after})
+
+    result["errors"] = [str(exception.value) for exception in app.exception]
+    return result
+
+def median_of(runs, key):
+    values = [run[key] for run in runs if run.get(key) is not None]
+    return statistics.median(values) if values else None
+
+def summarize(scenario, runs):
+    return {
+        "scenario": scenario["name"],
+        "render_s": median_of(runs, "render_s"),
+        "input_rerun_s": median_of(runs, "input_rerun_s"),
+        "end_to_end_s": median_of(runs, "end_to_end_s"),
+        "calls": median_of(runs, "calls"),
+        "prompt_tokens": median_of(runs, "input_tokens"),
+        "output_tokens": median_of(runs, "output_tokens"),
+        "errors": sorted({error for run in runs for error in run["errors"]})
+    }
+
+def format_seconds(value):
+    return "-" if value is None else f"{value * 1000:.0f} ms"
+
+def format_count(value):
+    return "-" if value is None else f"{value:.0f}"
+
+def print_table(rows):
+    header = f"{'scenario':<20} {'render':>9} {'rerun':>9} {'end-to-end':>11} {'calls':>6} {'prompt tok':>11} {'output tok':>11}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['scenario']:<20} {format_seconds(row['render_s']):>9} {format_seconds(row['input_rerun_s']):>9} "
+            f"{format_seconds(row['end_to_end_s']):>11} {format_count(row['calls']):>6} "
+            f"{format_count(row['prompt_tokens']):>11} {format_count(row['output_tokens']):>11}"
+        )
+        for error in row["errors"]:
+            print(f"    error: {error}")
+
+def main():
+    args = parse_args()
+    # One session at a time should never wait on the shared rate limiter
+    os.environ.setdefault("EDUPULSE_RATE_LIMIT_PER_SECOND", "1000")
+    os.environ.setdefault("EDUPULSE_RATE_LIMIT_BURST", "1000")
+    configure_environment(args)
+    seed_transcript()
+    disable_rerun()
+
+    rows = []
+    for scenario in SCENARIOS:
+        if args.only and args.only.lower() not in scenario["name"].lower():
+            continue
+        runs = [run_scenario(scenario) for _ in range(args.runs)]
+        rows.append(summarize(scenario, runs))
+
+    print_table(rows)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+    return 1 if any(row["errors"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Cold-start import time of every page.
+
+Each measurement runs in a fresh Python process, like a new server worker: it
+imports streamlit, then the page's own top-level imports, and reports both
+times plus the wall time of the whole process. The last rows show importing
+every page in one process and the cost that is deferred to the first model call.
+
+    python benchmarks/startup_benchmark.py --runs 5
+    python benchmarks/startup_benchmark.py --modules 15    # heaviest modules per page
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by init_watsonx on the first model call
+DEFERRED_IMPORTS = "import ibm_watsonx_ai\nimport ibm_watsonx_ai.foundation_models\nimport httpx"
+
+_MEASURE = """
+import json, os, sys, time
+sys.path.insert(0, {app_dir!r})
+os.chdir({app_dir!r})
+started = time.perf_counter()
+import streamlit
+streamlit_done = time.perf_counter()
+{imports}
+print(json.dumps({{
+    "streamlit_s": streamlit_done - started,
+    "imports_s": time.perf_counter() - streamlit_done,
+    "modules": len(sys.modules)
+}}))
+"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per page (median is reported)")
+    parser.add_argument("--modules", type=int, default=0, help="also list this many of the slowest modules per page")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args()
+
+def page_imports(path):
+    """The top-level import statements of a page"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+def environment():
+    env = dict(os.environ)
+    env["EDUPULSE_CACHE_DIR"] = tempfile.mkdtemp(prefix="edupulse-startup-")
+    env.pop("EDUPULSE_METRICS_PORT", None)
+    return env
+
+def measure(imports, env, importtime=False):
+    """Run one fresh interpreter and return its timings"""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + [
+        "-c", _MEASURE.format(app_dir=APP_DIR, imports=imports)
+    ]
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True, env=env, cwd=APP_DIR)
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_s"] = wall
+    if importtime:
+        result["importtime"] = completed.stderr
+    return result
+
+def slowest_modules(importtime_output, count):
+    """Modules imported by the page itself (after streamlit) with the largest cumulative time"""
+    modules = []
+    after_streamlit = False
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports are indented by one space, their dependencies by more
+        if len(name) - len(name.lstrip()) != 1:
+            continue
+        if after_streamlit:
+            modules.append((int(cumulative) / 1e6, name.strip()))
+        elif name.strip() == "streamlit":
+            after_streamlit = True
+    return sorted(modules, reverse=True)[:count]
+
+def page_order(path):
+    """Sort pages the way Streamlit numbers them in the sidebar"""
+    name = os.path.basename(path)
+    number = name.split("_", 1)[0]
+    return (int(number) if number.isdigit() else float("inf"), name)
+
+def main():
+    args = parse_args()
+    env = environment()
+
+    pages = [os.path.join(APP_DIR, "Landing.py")] + sorted(
+        glob.glob(os.path.join(APP_DIR, "pages", "*.py")), key=page_order
+    )
+    cases = [(os.path.basename(path), page_imports(path)) for path in pages]
+    all_imports = "\n".join(dict.fromkeys(line for _, imports in cases for line in imports.splitlines()))
+    cases.append(("all pages", all_imports))
+    cases.append(("first model call", all_imports + "\n" + DEFERRED_IMPORTS))
+
+    rows = []
+    for name, imports in cases:
+        runs = [measure(imports, env) for _ in range(args.runs)]
+        row = {
+            "page": name,
+            "streamlit_s": statistics.median(run["streamlit_s"] for run in runs),
+            "imports_s": statistics.median(run["imports_s"] for run in runs),
+            "process_s": statistics.median(run["process_s"] for run in runs),
+            "modules": runs[-1]["modules"]
+        }
+        if args.modules:
+            row["slowest"] = slowest_modules(measure(imports, env, importtime=True)["importtime"], args.modules)
+        rows.append(row)
+
+    header = f"{'page':<44} {'streamlit':>10} {'page imports':>13} {'process':>9} {'modules':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['page']:<44} {row['streamlit_s'] * 1000:>8.0f}ms {row['imports_s'] * 1000:>11.0f}ms "
+              f"{row['process_s'] * 1000:>7.0f}ms {row['modules']:>8}")
+        for seconds, module in row.get("slowest", []):
+            print(f"    {seconds * 1000:>8.1f}ms  {module}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from storage import open_database
+
+# Memory for recently used texts, decoded, shared by the whole server. Other texts
+# are read back from their compressed copy on disk.
+MAX_MEMORY_BYTES = int(float(os.getenv('EDUPULSE_BLOB_MEMORY_MB', '32')) * 1024 * 1024)
+
+# Blobs and their derived results are dropped after this long without being used.
+# Matches the history retention, so history entries keep finding their texts.
+BLOB_TTL_SECONDS = float(os.getenv('EDUPULSE_BLOB_TTL_DAYS', '30')) * 24 * 3600
+
+# Derived results are model output, so they follow the response cache switch
+DERIVED_CACHE_ENABLED = os.getenv('EDUPULSE_LLM_CACHE', '1') != '0'
+
+def content_hash(text):
+    """Key of a text in the blob store"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def options_key(options):
+    return json.dumps(options, sort_keys=True, default=str)
+
+class BlobStore:
+    """Documents, transcripts and code stored once per content, keyed by their hash.
+
+    Sessions keep the hash instead of a copy of the text. Results derived from a
+    text (a summary, a code review) are cached under the same hash together with
+    the options they were generated with, so a text pasted by many students is
+    sent to the model once per set of options.
+    """
+
+    def __init__(self, db_name="blobs.sqlite3", max_memory_bytes=MAX_MEMORY_BYTES, ttl_seconds=BLOB_TTL_SECONDS,
+                 derived_enabled=DERIVED_CACHE_ENABLED):
+        self.db_name = db_name
+        self.derived_enabled = derived_enabled
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._db = None
+        self._writes_since_prune = 0
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        self.derived_hits = 0
+        self.derived_misses = 0
+
+    def _database(self):
+        if self._db is None:
+            self._db = open_database(self.db_name)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS derived (
+                    hash TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (hash, kind, options)
+                )"""
+            )
+        return self._db
+
+    def _remember(self, blob_hash, text):
+        """Keep a text in memory, least recently used out first, within the byte budget"""
+        if blob_hash in self._memory:
+            self._memory.move_to_end(blob_hash)
+            return
+        size = sys.getsizeof(text)
+        if size > self.max_memory_bytes // 4:
+            # One book-length text would push out everything else; it is read from disk instead
+            return
+        self._memory[blob_hash] = text
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sys.getsizeof(evicted)
+
+    def put(self, text):
+        """Store a text unless an identical one is already stored, and return its hash"""
+        blob_hash = content_hash(text)
+        now = time.time()
+        with self._lock:
+            self._remember(blob_hash, text)
+            try:
+                db = self._database()
+                cursor = db.execute(
+                    "UPDATE blobs SET accessed_at = ? WHERE hash = ?", (now, blob_hash)
+                )
+                if cursor.rowcount:
+                    self.deduplicated += 1
+                    self.bytes_saved += len(text.encode('utf-8'))
+                else:
+                    db.execute(
+                        "INSERT OR IGNORE INTO blobs (hash, body, size, accessed_at) VALUES (?, ?, ?, ?)",
+                        (blob_hash, zlib.compress(text.encode('utf-8'), 6), len(text), now)
+                    )
+                    self.stored += 1
+                    self._writes_since_prune += 1
+                    if self._writes_since_prune >= 100:
+                        self._prune(db, now)
+            except Exception:
+                # The text stays usable from memory; the store is only an optimization
+                pass
+        return blob_hash
+
+    def get(self, blob_hash):
+        """Return the text stored under a hash, or None if it is unknown or has expired"""
+        with self._lock:
+            if blob_hash in self._memory:
+                self._memory.move_to_end(blob_hash)
+                return self._memory[blob_hash]
+            try:
+                row = self._database().execute(
+                    "SELECT body FROM blobs WHERE hash = ?", (blob_hash,)
+                ).fetchone()
+            except Exception:
+                row = None
+            if row is None:
+                return None
+            text = zlib.decompress(row[0]).decode('utf-8')
+            self._remember(blob_hash, text)
+            return text
+
+    def get_derived(self, blob_hash, kind, options):
+        """Return the cached result of kind generated from a blob with these options, or None"""
+        if not self.derived_enabled:
+            return None
+        with self._lock:
+            try:
+                row = self._database().execute(
+                    "SELECT result FROM derived WHERE hash = ? AND kind = ? AND options = ?",
+                    (blob_hash, kind, options_key(options))
+                ).fetchone()
+            except Exception:
+                row = None
+            if row is None:
+                self.derived_misses += 1
+                return None
+            self.derived_hits += 1
+            return row[0]
+
+    def set_derived(self, blob_hash, kind, options, result):
+        """Cache a result generated from a blob; error messages are never cached"""
+        if not self.derived_enabled or not result or result.startswith("Error"):
+            return
+        with self._lock:
+            try:
+                self._database().execute(
+                    "INSERT OR REPLACE INTO derived (hash, kind, options, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (blob_hash, kind, options_key(options), result, time.time())
+                )
+            except Exception:
+                pass
+
+    def _prune(self, db, now):
+        """Drop blobs unused for the retention period, with their derived results"""
+        self._writes_since_prune = 0
+        cutoff = now - self.ttl_seconds
+        db.execute("DELETE FROM derived WHERE hash IN (SELECT hash FROM blobs WHERE accessed_at < ?)", (cutoff,))
+        db.execute("DELETE FROM blobs WHERE accessed_at < ?", (cutoff,))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.derived_hits + self.derived_misses
+            return {
+                "stored": self.stored,
+                "deduplicated": self.deduplicated,
+                "bytes_saved": self.bytes_saved,
+                "derived_hits": self.derived_hits,
+                "derived_misses": self.derived_misses,
+                "derived_hit_rate": self.derived_hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes
+            }
+
+blob_store = BlobStore()
+
+def derive(blob_hash, kind, options, target, *args, cache_if=None, **kwargs):
+    """Run a generation target for a blob and cache its result, passing its output through.
+
+    Used for background jobs: target returns the text or yields chunks, like a job target.
+    A result that cache_if rejects is passed through but not cached.
+    """
+    result = target(*args, **kwargs)
+    if isinstance(result, str):
+        chunks = [result]
+        yield result
+    else:
+        chunks = []
+        try:
+            for chunk in result:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            # A cancelled job closes this generator; stop the generation with it
+            result.close()
+    result = "".join(chunks)
+    if cache_if is None or cache_if(result):
+        blob_store.set_derived(blob_hash, kind, options, result)
@@ -0,0 +1,86 @@
+import os
+import re
+
+from utils import estimate_tokens, truncate_to_tokens
+
+# Token budget for the conversation context sent with each follow-up question
+CONTEXT_TOKENS = int(os.getenv('EDUPULSE_QA_CONTEXT_TOKENS', '600'))
+
+# Words that point back at the conversation. A question using any of them is treated
+# as a follow-up; a false positive only costs an answer from the shared index.
+_REFERRING_WORDS = {
+    "it", "its", "it's", "this", "that", "these", "those", "they", "them", "their", "he", "she",
+    "him", "her", "his", "one", "ones", "above", "previous", "earlier", "again", "more", "further",
+    "another", "else", "same", "example", "examples", "elaborate", "simpler", "said", "mentioned"
+}
+
+# Openings that continue the previous question
+_FOLLOW_UP_OPENINGS = ("and ", "but ", "also ", "so ", "then ", "what about", "how about", "why not", "what if")
+
+def is_follow_up(question):
+    """Check whether a question may depend on the conversation so far"""
+    text = " ".join(question.lower().split())
+    words = re.findall(r"[a-z']+", text)
+    return (len(words) < 3 or text.startswith(_FOLLOW_UP_OPENINGS)
+            or any(word in _REFERRING_WORDS for word in words))
+
+def _first_sentences(text, max_tokens):
+    """Leading sentences of an answer, used as its key point"""
+    text = " ".join(text.split())
+    point = ""
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        candidate = f"{point} {sentence}".strip()
+        if point and estimate_tokens(candidate) > max_tokens:
+            break
+        point = candidate
+    return truncate_to_tokens(point, max_tokens)
+
+class ConversationContext:
+    """Compact rolling context for Q&A follow-ups.
+
+    Keeps the most recent turn in detail and one short line per earlier turn.
+    Older lines are dropped first, so the rendered context never exceeds the
+    token budget however long the conversation gets.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKENS):
+        self.token_budget = token_budget
+        self.summary = []
+        self.last_turn = None
+
+    def add_turn(self, question, answer):
+        """Record a question and answer, folding the previous turn into the summary"""
+        if self.last_turn:
+            previous_question, previous_answer = self.last_turn
+            self.summary.append(
+                f"- {truncate_to_tokens(' '.join(previous_question.split()), 30)} "
+                f"→ {_first_sentences(previous_answer, 40)}"
+            )
+        self.last_turn = (question, answer)
+
+        summary_budget = self.token_budget - estimate_tokens(self._render_last_turn())
+        while self.summary and estimate_tokens("\n".join(self.summary)) > summary_budget:
+            self.summary.pop(0)
+
+    def _render_last_turn(self):
+        if not self.last_turn:
+            return ""
+        question, answer = self.last_turn
+        recent_budget = self.token_budget * 2 // 3
+        question = truncate_to_tokens(question, recent_budget // 4)
+        answer = truncate_to_tokens(answer, recent_budget - estimate_tokens(question))
+        return f"Q: {question}\nA: {answer}"
+
+    def render(self):
+        """Return the context text for the next prompt"""
+        parts = []
+        if self.summary:
+            parts.append("Earlier in this conversation:\n" + "\n".join(self.summary))
+        if self.last_turn:
+            parts.append("Most recent exchange:\n" + self._render_last_turn())
+        return "\n\n".join(parts)
+
+    def clear(self):
+        """Forget the whole conversation"""
+        self.summary = []
+        self.last_turn = None
@@ -0,0 +1,329 @@
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from http.cookies import SimpleCookie
+
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.web.server.websocket_headers import _get_websocket_headers
+
+from storage import open_database
+
+# Entries shown per page of a history
+PAGE_SIZE = int(os.getenv('EDUPULSE_HISTORY_PAGE_SIZE', '5'))
+
+# Newest entries of each history kept in session state; older ones are read from SQLite.
+# One page by default, so the first page never touches the database.
+HOT_ENTRIES = int(os.getenv('EDUPULSE_HISTORY_HOT_ENTRIES', str(PAGE_SIZE)))
+
+# Rendered entries kept for the whole server, so a rerun does not format them again
+MAX_RENDERED_ENTRIES = int(os.getenv('EDUPULSE_HISTORY_RENDER_CACHE', '2000'))
+
+# Stored entries per history and how long they are kept
+MAX_ENTRIES = int(os.getenv('EDUPULSE_HISTORY_MAX_ENTRIES', '500'))
+TTL_SECONDS = float(os.getenv('EDUPULSE_HISTORY_TTL_DAYS', '30')) * 24 * 3600
+
+# Browser cookie holding the key of the student's histories
+HISTORY_COOKIE = "edupulse_history"
+
+def _pack(entry):
+    return zlib.compress(json.dumps(entry, ensure_ascii=False).encode('utf-8'), 6)
+
+def _unpack(body):
+    return json.loads(zlib.decompress(body).decode('utf-8'))
+
+class HistoryStore:
+    """Session histories in SQLite, with the entry bodies compressed in a separate table"""
+
+    def __init__(self, db_name="history.sqlite3", max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.db_name = db_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes_since_prune = 0
+        self.appended = 0
+        self.pages_loaded = 0
+        self.stored_bytes = 0
+        self.raw_bytes = 0
+
+    def _database(self):
+        if self._db is None:
+            self._db = open_database(self.db_name)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS history_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sid TEXT NOT NULL,
+                    history TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS history_entries_by_session ON history_entries (sid, history, id)"
+            )
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS history_bodies (
+                    entry_id INTEGER PRIMARY KEY,
+                    body BLOB NOT NULL
+                )"""
+            )
+        return self._db
+
+    def append(self, sid, history, entry):
+        """Store one entry and return its ID, or None if it could not be stored"""
+        now = time.time()
+        body = _pack(entry)
+        with self._lock:
+            try:
+                db = self._database()
+                db.execute("BEGIN")
+                cursor = db.execute(
+                    "INSERT INTO history_entries (sid, history, created_at) VALUES (?, ?, ?)", (sid, history, now)
+                )
+                db.execute("INSERT INTO history_bodies (entry_id, body) VALUES (?, ?)", (cursor.lastrowid, body))
+                self._trim(db, sid, history)
+                db.execute("COMMIT")
+                self.appended += 1
+                self.stored_bytes += len(body)
+                self.raw_bytes += len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune(db, now)
+                return cursor.lastrowid
+            except Exception:
+                # History is a convenience; failing to store it must never break a page
+                if self._db is not None and self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                return None
+
+    def page(self, sid, history, offset, limit):
+        """Return up to limit entries, newest first, skipping the newest offset entries.
+
+        Each entry carries its ID under "id".
+        """
+        with self._lock:
+            try:
+                rows = self._database().execute(
+                    """SELECT e.id, b.body FROM history_entries e JOIN history_bodies b ON b.entry_id = e.id
+                    WHERE e.sid = ? AND e.history = ? ORDER BY e.id DESC LIMIT ? OFFSET ?""",
+                    (sid, history, limit, offset)
+                ).fetchall()
+                self.pages_loaded += 1
+                return [dict(_unpack(body), id=entry_id) for entry_id, body in rows]
+            except Exception:
+                return []
+
+    def count(self, sid, history):
+        with self._lock:
+            try:
+                return self._database().execute(
+                    "SELECT COUNT(*) FROM history_entries WHERE sid = ? AND history = ?", (sid, history)
+                ).fetchone()[0]
+            except Exception:
+                return 0
+
+    def clear(self, sid, history):
+        """Delete every entry of one history"""
+        with self._lock:
+            try:
+                db = self._database()
+                db.execute("BEGIN")
+                db.execute(
+                    """DELETE FROM history_bodies WHERE entry_id IN (
+                        SELECT id FROM history_entries WHERE sid = ? AND history = ?
+                    )""",
+                    (sid, history)
+                )
+                db.execute("DELETE FROM history_entries WHERE sid = ? AND history = ?", (sid, history))
+                db.execute("COMMIT")
+            except Exception:
+                if self._db is not None and self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+
+    def _trim(self, db, sid, history):
+        """Drop the oldest entries of a history above the size limit"""
+        stale = """SELECT id FROM history_entries WHERE sid = ? AND history = ?
+                   ORDER BY id DESC LIMIT -1 OFFSET ?"""
+        db.execute(f"DELETE FROM history_bodies WHERE entry_id IN ({stale})", (sid, history, self.max_entries))
+        db.execute(f"DELETE FROM history_entries WHERE id IN ({stale})", (sid, history, self.max_entries))
+
+    def _prune(self, db, now):
+        """Drop entries older than the retention period"""
+        self._writes_since_prune = 0
+        cutoff = now - self.ttl_seconds
+        db.execute(
+            "DELETE FROM history_bodies WHERE entry_id IN (SELECT id FROM history_entries WHERE created_at < ?)",
+            (cutoff,)
+        )
+        db.execute("DELETE FROM history_entries WHERE created_at < ?", (cutoff,))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "appended": self.appended,
+                "pages_loaded": self.pages_loaded,
+                "compression_ratio": self.raw_bytes / self.stored_bytes if self.stored_bytes else None
+            }
+
+history_store = HistoryStore()
+
+class SessionHistory:
+    """One history of one session: the newest entries in memory, the rest in the history store"""
+
+    def __init__(self, sid, name, store=history_store, hot_entries=HOT_ENTRIES):
+        self.sid = sid
+        self.name = name
+        self.store = store
+        self.hot_entries = hot_entries
+        self._count = store.count(sid, name)
+        self._recent = store.page(sid, name, 0, hot_entries)
+
+    def __len__(self):
+        return self._count
+
+    def append(self, entry):
+        entry_id = self.store.append(self.sid, self.name, entry)
+        # An entry the store could not keep still needs an ID for the render cache
+        self._recent.insert(0, dict(entry, id=entry_id or uuid.uuid4().hex))
+        del self._recent[self.hot_entries:]
+        self._count = min(self._count + 1, self.store.max_entries)
+
+    def latest(self):
+        return self._recent[0] if self._recent else None
+
+    def page(self, offset, limit):
+        """Entries newest first; only reads the store beyond the in-memory window"""
+        if offset + limit <= len(self._recent) or len(self._recent) == self._count:
+            return self._recent[offset:offset + limit]
+        return self.store.page(self.sid, self.name, offset, limit)
+
+    def clear(self):
+        self.store.clear(self.sid, self.name)
+        self._recent = []
+        self._count = 0
+
+def _history_cookie():
+    """History key sent by the browser in its cookie, if it has a valid one"""
+    try:
+        headers = _get_websocket_headers() or {}
+        cookie = SimpleCookie(headers.get("Cookie", ""))
+    except Exception:
+        return None
+    morsel = cookie.get(HISTORY_COOKIE)
+    if morsel is None or not re.fullmatch(r"[0-9a-f]{32}", morsel.value):
+        return None
+    return morsel.value
+
+def _set_history_cookie(sid):
+    """Store the history key in a cookie of this browser, where a shared link cannot carry it"""
+    components.html(
+        f"""<script>
+        window.parent.document.cookie = "{HISTORY_COOKIE}={sid}; path=/; max-age={int(TTL_SECONDS)}; SameSite=Strict"
+            + (window.parent.location.protocol === "https:" ? "; Secure" : "");
+        </script>""",
+        height=0
+    )
+
+def session_id():
+    """Stable ID of the student's histories, kept in a browser cookie across reloads.
+
+    The ID is a bearer key to the histories, so it never appears in the URL.
+    """
+    if "history_sid" not in st.session_state:
+        sid = _history_cookie()
+        if sid is None:
+            sid = secrets.token_hex(16)
+            _set_history_cookie(sid)
+        st.session_state.history_sid = sid
+    # Links from before the cookie carried the key in the address; drop it so it is not shared further
+    if "sid" in st.query_params:
+        del st.query_params["sid"]
+    return st.session_state.history_sid
+
+def get_history(name):
+    """The session's history with this name, loaded from the store on first use"""
+    if name not in st.session_state:
+        st.session_state[name] = SessionHistory(session_id(), name)
+    return st.session_state[name]
+
+class _RenderCache:
+    """Rendered markdown of history entries, least recently used first out"""
+
+    def __init__(self, max_entries=MAX_RENDERED_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        rendered = render()
+        with self._lock:
+            self._entries[key] = rendered
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+render_cache = _RenderCache()
+
+def _set_page(state_key, page):
+    st.session_state[state_key] = page
+
+def render_history(history, render_entry, title=None, page_size=PAGE_SIZE):
+    """Show one page of a history, newest first, with buttons for newer and older pages.
+
+    render_entry(entry) returns the markdown (HTML allowed) of one entry. It runs
+    once per entry; later reruns reuse the cached result. With title(entry, number),
+    each entry is shown in an expander with that label.
+    """
+    page_key = f"{history.name}_page"
+    seen_key = f"{history.name}_seen"
+    # A new entry brings the student back to the first page, where it appears
+    if st.session_state.get(seen_key) != len(history):
+        st.session_state[seen_key] = len(history)
+        st.session_state[page_key] = 0
+    pages = max(1, -(-len(history) // page_size))
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+
+    offset = page * page_size
+    for index, entry in enumerate(history.page(offset, page_size)):
+        markdown = render_cache.get(
+            (history.sid, history.name, entry["id"], render_entry.__name__),
+            lambda: render_entry(entry)
+        )
+        if title is None:
+            st.markdown(markdown, unsafe_allow_html=True)
+        else:
+            with st.expander(title(entry, len(history) - offset - index)):
+                st.markdown(markdown, unsafe_allow_html=True)
+
+    if pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Newer", key=f"{history.name}_newer", disabled=page == 0,
+                      on_click=_set_page, args=(page_key, page - 1))
+        with col2:
+            st.markdown(
+                f"<p class='info-text' style='text-align: center;'>Page {page + 1} of {pages} · "
+                f"{len(history)} entries</p>",
+                unsafe_allow_html=True
+            )
+        with col3:
+            st.button("Older ▶", key=f"{history.name}_older", disabled=page == pages - 1,
+                      on_click=_set_page, args=(page_key, page + 1))
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import listen_queue, session_context
+
+# Worker threads for background generations. Most of their time is spent waiting
+# on the model, so this is well above the number of concurrent model calls.
+JOB_WORKERS = int(os.getenv('EDUPULSE_JOB_WORKERS', '32'))
+
+# Finished jobs are kept this long so a student can come back to the page for the result
+JOB_RESULT_TTL_SECONDS = float(os.getenv('EDUPULSE_JOB_RESULT_TTL_SECONDS', '3600'))
+
+class Job:
+    """One background generation, its partial output and its outcome"""
+
+    def __init__(self, label):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.state = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.cancelled = False
+        # Requests ahead of this job's current model call, while it waits for a slot
+        self.queue_position = None
+        self._chunks = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def append(self, chunk):
+        with self._lock:
+            self._chunks.append(chunk)
+
+    def text(self):
+        """Output generated so far, or the whole result once the job is done"""
+        with self._lock:
+            return "".join(self._chunks)
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+class JobQueue:
+    """Runs generations on a worker pool, independently of the script run that started them.
+
+    A target is either a function returning the text or a generator yielding text
+    chunks, which become visible as partial output while the job runs. Raising an
+    exception or returning an "Error: ..." string marks the job as failed.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, result_ttl=JOB_RESULT_TTL_SECONDS):
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="edupulse-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._submitted = 0
+        self._failed = 0
+
+    def submit(self, target, *args, label="generation", **kwargs):
+        """Queue a job and return its ID"""
+        job = Job(label)
+        # Run in a copy of the caller's context, so metrics keep the page's feature and
+        # the scheduler bills the job to the session that started it
+        context = session_context()
+        with self._lock:
+            self._prune(time.time())
+            self._jobs[job.id] = job
+            self._submitted += 1
+        self._executor.submit(context.run, self._run, job, target, args, kwargs)
+        return job.id
+
+    def get(self, job_id):
+        """Return the job, or None if it is unknown or has expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Stop a job at its next chunk; a job that has not started never runs"""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancelled = True
+
+    def _run(self, job, target, args, kwargs):
+        if job.cancelled:
+            self._finish(job, "cancelled")
+            return
+        job.state = "running"
+        job.started_at = time.time()
+        try:
+            with listen_queue(lambda position: setattr(job, "queue_position", position)):
+                result = target(*args, **kwargs)
+                if isinstance(result, str):
+                    job.append(result)
+                else:
+                    for chunk in result:
+                        if job.cancelled:
+                            result.close()
+                            self._finish(job, "cancelled")
+                            return
+                        job.append(chunk)
+            text = job.text()
+            if text.startswith("Error"):
+                self._finish(job, "failed", text)
+            else:
+                self._finish(job, "done")
+        except Exception as e:
+            self._finish(job, "failed", f"Error: {str(e)}")
+
+    def _finish(self, job, state, error=None):
+        job.error = error
+        job.finished_at = time.time()
+        job.state = state
+        if state == "failed":
+            with self._lock:
+                self._failed += 1
+
+    def _prune(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+            return {
+                "submitted": self._submitted,
+                "failed": self._failed,
+                "queued": states.count("queued"),
+                "running": states.count("running"),
+                "kept": len(states)
+            }
+
+job_queue = JobQueue()
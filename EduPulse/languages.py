@@ -0,0 +1,64 @@
+import re
+
+# Languages offered on the Multi-Language page
+LANGUAGES = {
+    "English": "en",
+    "Spanish": "es",
+    "French": "fr",
+    "German": "de",
+    "Chinese": "zh",
+    "Hindi": "hi",
+    "Arabic": "ar",
+    "Japanese": "ja",
+    "Korean": "ko",
+    "Russian": "ru"
+}
+
+# Languages identified by their writing system
+_SCRIPTS = [
+    ("ja", re.compile(r'[぀-ヿ]')),
+    ("ko", re.compile(r'[가-힯ᄀ-ᇿ]')),
+    ("zh", re.compile(r'[一-鿿]')),
+    ("hi", re.compile(r'[ऀ-ॿ]')),
+    ("ar", re.compile(r'[؀-ۿ]')),
+    ("ru", re.compile(r'[Ѐ-ӿ]'))
+]
+
+# Frequent function words of the Latin-script languages
+_STOPWORDS = {
+    "en": {"the", "is", "are", "and", "of", "to", "in", "what", "how", "why", "does", "do",
+           "a", "an", "it", "this", "that", "with", "for", "can", "you", "be", "which", "was"},
+    "es": {"el", "la", "los", "las", "es", "son", "y", "de", "que", "en", "qué", "cómo", "por",
+           "un", "una", "con", "para", "del", "se", "al", "cuál", "está", "lo", "como"},
+    "fr": {"le", "la", "les", "est", "sont", "et", "de", "des", "que", "en", "quoi", "comment",
+           "un", "une", "avec", "pour", "du", "ce", "qui", "dans", "pourquoi", "au", "il", "quelle"},
+    "de": {"der", "die", "das", "ist", "sind", "und", "von", "zu", "in", "was", "wie", "warum",
+           "ein", "eine", "mit", "für", "den", "dem", "nicht", "auf", "es", "ich", "welche", "wird"}
+}
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+def detect_language(text):
+    """Guess the ISO code of the language a text is written in, or None if unsure"""
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return None
+
+    for code, pattern in _SCRIPTS:
+        if len(pattern.findall(text)) / len(letters) > 0.3:
+            return code
+
+    words = [word.lower() for word in _WORD_PATTERN.findall(text)]
+    if not words:
+        return None
+    scores = {code: sum(word in stopwords for word in words) for code, stopwords in _STOPWORDS.items()}
+    best = max(scores, key=scores.get)
+    ranked = sorted(scores.values(), reverse=True)
+    # Require a clear winner; short or mixed texts stay undetected
+    if ranked[0] < 2 or ranked[0] < 1.5 * ranked[1]:
+        return None
+    return best
+
+def is_in_language(text, language_name):
+    """Check whether a text is confidently detected as the named language"""
+    return detect_language(text) == LANGUAGES.get(language_name)
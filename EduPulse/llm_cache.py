@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from storage import open_database
+
+def normalize_prompt(prompt):
+    """Normalize line endings and surrounding whitespace so trivial edits share a cache entry"""
+    lines = [line.rstrip() for line in prompt.replace('\r\n', '\n').split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def make_cache_key(model_id, params, prompt):
+    """Build a stable key from the model, its generation parameters and the prompt"""
+    payload = json.dumps(
+        {"model": model_id, "params": params, "prompt": normalize_prompt(prompt)},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """Two-level cache for generated text: an in-memory LRU in front of a SQLite table"""
+
+    def __init__(self, db_name="llm_cache.sqlite3", max_memory_entries=512,
+                 max_disk_entries=20000, ttl_seconds=7 * 24 * 3600):
+        self.db_name = db_name
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._db = None
+        self._writes_since_prune = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _database(self):
+        if self._db is None:
+            self._db = open_database(self.db_name)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        return self._db
+
+    def _remember(self, key, created_at, response):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached response for a key, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+            try:
+                db = self._database()
+                row = db.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] < self.ttl_seconds:
+                    db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._remember(key, row[1], row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            except Exception:
+                # A broken cache file must never break generation
+                pass
+
+            self.misses += 1
+            return None
+
+    def set(self, key, response):
+        """Store a response in memory and on disk"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            try:
+                db = self._database()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, response, now, now)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune(db, now)
+            except Exception:
+                pass
+
+    def _prune(self, db, now):
+        """Drop expired rows and the least recently used rows above the size limit"""
+        self._writes_since_prune = 0
+        db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        db.execute(
+            """DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_disk_entries,)
+        )
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._memory.clear()
+            try:
+                self._database().execute("DELETE FROM responses")
+            except Exception:
+                pass
+
+    def stats(self):
+        """Return hit and miss counters"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+response_cache = ResponseCache(
+    max_memory_entries=int(os.getenv('EDUPULSE_CACHE_MEMORY_ENTRIES', '512')),
+    max_disk_entries=int(os.getenv('EDUPULSE_CACHE_DISK_ENTRIES', '20000')),
+    ttl_seconds=float(os.getenv('EDUPULSE_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+)
@@ -0,0 +1,259 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+from streamlit.runtime.state.session_state import SCRIPT_RUN_WITHOUT_ERRORS_KEY
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# Set EDUPULSE_METRICS_PORT to serve the Prometheus export at http://host:port/metrics
+METRICS_PORT = os.getenv('EDUPULSE_METRICS_PORT')
+
+_HELP = {
+    "edupulse_page_runs_total": ("counter", "Script reruns per page"),
+    "edupulse_page_errors_total": ("counter", "Script reruns that ended in an uncaught exception"),
+    "edupulse_page_run_seconds": ("histogram", "Duration of one script rerun"),
+    "edupulse_llm_requests_total": ("counter", "Model requests by outcome (ok, error, cache_hit, coalesced, interrupted)"),
+    "edupulse_llm_request_seconds": ("histogram", "Duration of a model request, including cache lookups"),
+    "edupulse_llm_first_chunk_seconds": ("histogram", "Time until the first chunk of a streamed answer"),
+    "edupulse_llm_prompt_tokens_total": ("counter", "Prompt tokens sent to the model"),
+    "edupulse_llm_output_tokens_total": ("counter", "Tokens generated by the model"),
+    "edupulse_llm_queue_seconds": ("histogram", "Time a model request waited for an upstream slot, by lane"),
+    "edupulse_llm_rejected_total": ("counter", "Model requests turned away by admission control, by lane")
+}
+
+# Feature (page) the current script run or request belongs to
+_current_feature = contextvars.ContextVar('edupulse_feature', default="other")
+
+class Histogram:
+    """Cumulative bucket counts in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, labelled by feature and profile"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counters(self, name):
+        """Return {labels: value} for one counter"""
+        with self._lock:
+            return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    def histograms(self, name):
+        """Return {labels: Histogram} for one histogram"""
+        with self._lock:
+            return {labels: histogram for (metric, labels), histogram in self._histograms.items() if metric == name}
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for name, (kind, help_text) in _HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for labels, value in sorted(self.counters(name).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            for labels, histogram in sorted(self.histograms(name).items()):
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+registry = MetricsRegistry()
+
+def current_feature():
+    return _current_feature.get()
+
+@contextmanager
+def feature_scope(feature):
+    """Attribute model calls made inside the block to a feature, without timing a page"""
+    token = _current_feature.set(feature)
+    try:
+        yield
+    finally:
+        _current_feature.reset(token)
+
+def start_page_timer(feature):
+    """Start timing a script rerun of a page; call it first thing on the page.
+
+    Model calls made during the rest of the run are attributed to the page, and
+    finish_page_timer at the bottom records its duration. A run that stops early
+    (st.rerun, st.stop or an exception) is counted but not timed; an exception is
+    counted as a page error on the session's next run, once Streamlit has flagged it.
+    """
+    _current_feature.set(feature)
+    unfinished = st.session_state.get("_page_timer")
+    if unfinished is not None and st.session_state.get(SCRIPT_RUN_WITHOUT_ERRORS_KEY) is False:
+        registry.increment("edupulse_page_errors_total", {"feature": unfinished[0]})
+    st.session_state["_page_timer"] = (feature, time.perf_counter())
+    registry.increment("edupulse_page_runs_total", {"feature": feature})
+
+def finish_page_timer():
+    """Record the duration of the run started by start_page_timer; call it last on the page"""
+    run = st.session_state.get("_page_timer")
+    if run is None:
+        return
+    del st.session_state["_page_timer"]
+    feature, started_at = run
+    registry.observe("edupulse_page_run_seconds", {"feature": feature}, time.perf_counter() - started_at)
+
+class LLMRequestTimer:
+    """Latency and outcome of one model request"""
+
+    def __init__(self, profile):
+        self.labels = {"feature": current_feature(), "profile": profile}
+        self.started_at = time.perf_counter()
+        self.first_chunk_seen = False
+        self.finished = False
+
+    def first_chunk(self):
+        if not self.first_chunk_seen:
+            self.first_chunk_seen = True
+            registry.observe("edupulse_llm_first_chunk_seconds", self.labels, time.perf_counter() - self.started_at)
+
+    def finish(self, outcome):
+        """Record the request once; later calls are ignored"""
+        if self.finished:
+            return
+        self.finished = True
+        registry.increment("edupulse_llm_requests_total", dict(self.labels, outcome=outcome))
+        registry.observe("edupulse_llm_request_seconds", self.labels, time.perf_counter() - self.started_at)
+
+def record_llm_tokens(profile, prompt_tokens, output_tokens):
+    labels = {"feature": current_feature(), "profile": profile}
+    registry.increment("edupulse_llm_prompt_tokens_total", labels, prompt_tokens)
+    registry.increment("edupulse_llm_output_tokens_total", labels, output_tokens)
+
+def feature_summary():
+    """Per-feature rows for the metrics page"""
+    rows = {}
+
+    def row(feature):
+        return rows.setdefault(feature, {
+            "feature": feature, "page_runs": 0, "page_errors": 0, "page_p50_s": None, "page_p95_s": None,
+            "llm_requests": 0, "llm_errors": 0, "cache_hits": 0, "llm_p50_s": None, "llm_p95_s": None,
+            "first_chunk_p50_s": None, "prompt_tokens": 0, "output_tokens": 0
+        })
+
+    for labels, value in registry.counters("edupulse_page_runs_total").items():
+        row(dict(labels)["feature"])["page_runs"] += value
+    for labels, value in registry.counters("edupulse_page_errors_total").items():
+        row(dict(labels)["feature"])["page_errors"] += value
+    for labels, value in registry.counters("edupulse_llm_requests_total").items():
+        labels = dict(labels)
+        entry = row(labels["feature"])
+        entry["llm_requests"] += value
+        if labels["outcome"] == "error":
+            entry["llm_errors"] += value
+        elif labels["outcome"] == "cache_hit":
+            entry["cache_hits"] += value
+    for labels, value in registry.counters("edupulse_llm_prompt_tokens_total").items():
+        row(dict(labels)["feature"])["prompt_tokens"] += value
+    for labels, value in registry.counters("edupulse_llm_output_tokens_total").items():
+        row(dict(labels)["feature"])["output_tokens"] += value
+
+    for name, prefix in (("edupulse_page_run_seconds", "page"), ("edupulse_llm_request_seconds", "llm"),
+                         ("edupulse_llm_first_chunk_seconds", "first_chunk")):
+        merged = {}
+        for labels, histogram in registry.histograms(name).items():
+            total = merged.setdefault(dict(labels)["feature"], Histogram())
+            total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+            total.count += histogram.count
+            total.sum += histogram.sum
+        for feature, histogram in merged.items():
+            entry = row(feature)
+            entry[f"{prefix}_p50_s"] = histogram.quantile(0.5)
+            if f"{prefix}_p95_s" in entry:
+                entry[f"{prefix}_p95_s"] = histogram.quantile(0.95)
+
+    return sorted(rows.values(), key=lambda entry: entry["feature"])
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port):
+    """Serve /metrics for Prometheus from a background thread, once per process"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(('', int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="edupulse-metrics", daemon=True).start()
+    return _server
+
+if METRICS_PORT:
+    try:
+        start_metrics_server(METRICS_PORT)
+    except OSError:
+        # Another process already serves the port
+        pass
@@ -0,0 +1,121 @@
+import hmac
+import os
+
+import streamlit as st
+from utils import load_css, get_cache_stats, get_coalescing_stats, get_profile_usage
+from metrics import METRICS_PORT, feature_summary, registry
+from resilience import get_resilience_stats
+from qa_index import question_index
+from translation_memory import translation_memory
+from warmup import get_warmup_status
+from jobs import job_queue
+from history import history_store, render_cache
+from blobs import blob_store
+
+# Page config
+st.set_page_config(page_title="Metrics", page_icon="📊", layout="wide")
+
+# Load CSS
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# Title
+st.markdown("<h1 class='main-title'>Metrics 📊</h1>", unsafe_allow_html=True)
+
+# Server internals are for administrators only; without a token the page stays disabled
+ADMIN_TOKEN = os.getenv('EDUPULSE_ADMIN_TOKEN')
+if not ADMIN_TOKEN:
+    st.info("This page is for administrators and is disabled on this server.")
+    st.stop()
+if not st.session_state.get("metrics_admin"):
+    token = st.text_input("Admin token", type="password")
+    if token and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        st.session_state.metrics_admin = True
+    else:
+        if token:
+            st.error("🚨 Invalid admin token.")
+        st.stop()
+
+# Description
+st.markdown(
+    """<div class='card'>
+        <h3>Server Activity</h3>
+        <p class='info-text'>Page reruns, model latency, token use and cache hits per feature since the server started.
+        The numbers are shared by every session of this server process.</p>
+    </div>""",
+    unsafe_allow_html=True
+)
+
+# Any click reruns the page with fresh numbers
+st.button("🔄 Refresh")
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f} s"
+
+# Per-feature table
+rows = feature_summary()
+if rows:
+    st.markdown("<h2 class='sub-title'>Features</h2>", unsafe_allow_html=True)
+    columns = [
+        "Feature", "Reruns", "Rerun p50", "Rerun p95", "Page errors", "Model requests", "Error rate",
+        "Cache hit rate", "Model p50", "Model p95", "First chunk p50", "Prompt tokens", "Output tokens"
+    ]
+    table = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    for row in rows:
+        requests = row["llm_requests"]
+        table.append("| " + " | ".join(str(value) for value in [
+            row["feature"],
+            row["page_runs"],
+            format_seconds(row["page_p50_s"]),
+            format_seconds(row["page_p95_s"]),
+            row["page_errors"],
+            requests,
+            f"{row['llm_errors'] / requests:.0%}" if requests else "-",
+            f"{row['cache_hits'] / requests:.0%}" if requests else "-",
+            format_seconds(row["llm_p50_s"]),
+            format_seconds(row["llm_p95_s"]),
+            format_seconds(row["first_chunk_p50_s"]),
+            row["prompt_tokens"],
+            row["output_tokens"]
+        ]) + " |")
+    st.markdown("\n".join(table))
+else:
+    st.info("No activity recorded yet. Use the other pages and refresh.")
+
+# Shared components
+st.markdown("<h2 class='sub-title'>Shared Components</h2>", unsafe_allow_html=True)
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.markdown("**Response cache**")
+    st.json(get_cache_stats())
+    st.markdown("**Coalesced requests**")
+    st.json(get_coalescing_stats())
+with col2:
+    st.markdown("**Upstream protection**")
+    st.json(get_resilience_stats())
+    st.markdown("**Q&A answer index**")
+    st.json(question_index.stats())
+    st.markdown("**Background jobs**")
+    st.json(job_queue.stats())
+    st.markdown("**Shared documents and code**")
+    st.json(blob_store.stats())
+with col3:
+    st.markdown("**Translation memory**")
+    st.json(translation_memory.stats())
+    st.markdown("**Tokens per generation profile**")
+    st.json(get_profile_usage())
+    st.markdown("**Session histories**")
+    st.json(history_store.stats())
+    st.markdown("**Rendered history entries**")
+    st.json(render_cache.stats())
+    st.markdown("**Server warm-up**")
+    st.json(get_warmup_status())
+
+# Prometheus export
+with st.expander("Prometheus export"):
+    if METRICS_PORT:
+        st.markdown(f"Scrape `http://<host>:{METRICS_PORT}/metrics`.")
+    else:
+        st.markdown("Set `EDUPULSE_METRICS_PORT` to serve this at `/metrics` for Prometheus.")
+    export = registry.to_prometheus()
+    st.download_button("📥 Download", export, file_name="edupulse_metrics.prom", mime="text/plain")
+    st.code(export, language="text")
@@ -1,5 +1,9 @@
 import streamlit as st
 from utils import load_css, run_watson_granite, show_error, show_success
+from metrics import finish_page_timer, start_page_timer
+from history import get_history, render_history
+
+start_page_timer("learning_assistant")
 
 # Page config
 st.set_page_config(page_title="Personalized Learning Assistant", page_icon="🎓", layout="wide")
@@ -10,9 +14,8 @@ st.markdown(load_css(), unsafe_allow_html=True)
 # Title
 st.markdown("<h1 class='main-title'>Personalized Learning Assistant 🎓</h1>", unsafe_allow_html=True)
 
-# Initialize session state for conversation history
-if 'learning_history' not in st.session_state:
-    st.session_state.learning_history = []
+# Conversation history: the newest entries in session state, older ones on disk
+learning_history = get_history("learning_history")
 
 # Default questions/templates
 default_questions = {
@@ -49,7 +52,7 @@ user_input = st.text_area("Type your question or use a template:", height=100)
 col1, col2 = st.columns([1, 5])
 with col1:
     if st.button("🧹 Clear History"):
-        st.session_state.learning_history = []
+        learning_history.clear()
         show_success("Conversation history cleared!")
         st.rerun()
 
@@ -64,10 +67,10 @@ with col2:
                 and creating structured learning plans. Be encouraging and supportive while
                 maintaining academic rigor."""
                 
-                response = run_watson_granite(user_input, system_prompt)
+                response = run_watson_granite(user_input, system_prompt, profile="learning")
                 
                 if response and not response.startswith("Error"):
-                    st.session_state.learning_history.append(
+                    learning_history.append(
                         {"question": user_input, "answer": response}
                     )
                     show_success("Response generated!")
@@ -80,21 +83,20 @@ with col2:
             show_error("Please enter your question first!")
 
 # Display conversation history
-if st.session_state.learning_history:
+if learning_history:
     st.markdown("<h2 class='sub-title'>Learning Journey</h2>", unsafe_allow_html=True)
     
-    for idx, interaction in enumerate(reversed(st.session_state.learning_history)):
-        st.markdown(
-            f"""<div class='card'>
+    def render_interaction(interaction):
+        return f"""<div class='card'>
                 <p><strong>Question:</strong></p>
                 <p>{interaction['question']}</p>
                 <div class='response-area'>
                     <p><strong>Response:</strong></p>
                     <p>{interaction['answer']}</p>
                 </div>
-            </div>""",
-            unsafe_allow_html=True
-        )
+            </div>"""
+    
+    render_history(learning_history, render_interaction)
 
 # Tips and Resources
 with st.expander("📚 Learning Tips & Resources"):
@@ -123,4 +125,6 @@ st.markdown(
         <p class='info-text'>Need help? Don't hesitate to ask!</p>
     </div>""",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+finish_page_timer()
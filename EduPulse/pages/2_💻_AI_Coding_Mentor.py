@@ -1,7 +1,12 @@
 import streamlit as st
-from utils import load_css, run_watson_granite, show_error, show_success, show_info
+from utils import load_css, run_watson_granite, render_watson_stream, show_error, show_success, show_info
+from metrics import finish_page_timer, start_page_timer
+from history import get_history, render_history
+from blobs import blob_store
 import json
 
+start_page_timer("coding_mentor")
+
 # Page config
 st.set_page_config(page_title="AI Coding Mentor", page_icon="💻", layout="wide")
 
@@ -11,9 +16,8 @@ st.markdown(load_css(), unsafe_allow_html=True)
 # Title
 st.markdown("<h1 class='main-title'>AI Coding Mentor 💻</h1>", unsafe_allow_html=True)
 
-# Initialize session state
-if 'code_history' not in st.session_state:
-    st.session_state.code_history = []
+# Analysis history: the newest entries in session state, older ones on disk
+code_history = get_history("code_history")
 
 # Sidebar with coding tasks
 st.sidebar.markdown("<h2 class='sub-title'>Coding Assistant</h2>", unsafe_allow_html=True)
@@ -62,7 +66,7 @@ code_input = st.text_area("Enter your code or description:", height=200)
 col1, col2, col3 = st.columns([1, 1, 3])
 with col1:
     if st.button("🧹 Clear History"):
-        st.session_state.code_history = []
+        code_history.clear()
         show_success("History cleared!")
         st.rerun()
 
@@ -74,14 +78,21 @@ with col3:
 
 if format_code and code_input:
     try:
+        # Code pasted by many students is stored and formatted once
+        code_ref = blob_store.put(code_input)
+        options = {"language": programming_language}
+
         # System prompt for code formatting
         format_prompt = f"""Format the following {programming_language} code with proper 
         indentation and style guidelines. Return only the formatted code:
         
         {code_input}"""
         
-        formatted_code = run_watson_granite(format_prompt)
+        formatted_code = blob_store.get_derived(code_ref, "code_format", options)
+        if formatted_code is None:
+            formatted_code = run_watson_granite(format_prompt, profile="code_format")
         if not formatted_code.startswith("Error"):
+            blob_store.set_derived(code_ref, "code_format", options, formatted_code)
             code_input = formatted_code
             show_success("Code formatted!")
         else:
@@ -92,6 +103,9 @@ if format_code and code_input:
 
 if analyze_code and code_input:
     try:
+        code_ref = blob_store.put(code_input)
+        options = {"language": programming_language, "task": task_type}
+
         # System prompt for code analysis
         system_prompt = f"""You are an expert {programming_language} developer and coding mentor.
         Analyze the code based on the selected task type: {task_type}.
@@ -103,11 +117,18 @@ if analyze_code and code_input:
         5. Performance optimization tips
         Format your response in a clear, structured way."""
         
-        response = run_watson_granite(code_input, system_prompt)
+        response = blob_store.get_derived(code_ref, "code_review", options)
+        if response is not None:
+            # Same code, language and task analyzed before: no model call needed
+            st.markdown(response)
+        else:
+            response = render_watson_stream(code_input, system_prompt, profile="code_review")
         
         if not response.startswith("Error"):
-            st.session_state.code_history.append({
-                "code": code_input,
+            blob_store.set_derived(code_ref, "code_review", options, response)
+            # The history keeps a reference to the stored code, not a copy
+            code_history.append({
+                "code_ref": code_ref,
                 "language": programming_language,
                 "task": task_type,
                 "analysis": response
@@ -120,17 +141,22 @@ if analyze_code and code_input:
         show_error(f"Analysis error: {str(e)}")
 
 # Display analysis history
-if st.session_state.code_history:
+if code_history:
     st.markdown("<h2 class='sub-title'>Analysis History</h2>", unsafe_allow_html=True)
     
-    for idx, entry in enumerate(reversed(st.session_state.code_history)):
-        with st.container():
-            st.markdown(f"**Task:** {entry['task']} ({entry['language']})")
-            st.markdown("**Code:**")
-            st.code(entry['code'], language=entry['language'].lower())
-            st.markdown("**Analysis:**")
-            st.markdown(entry['analysis'])
-            st.markdown("---")
+    def render_analysis(entry):
+        code = entry.get('code')
+        if code is None:
+            code = blob_store.get(entry['code_ref']) or "# The code is no longer available"
+        # One markdown block per entry; the fenced code renders like st.code
+        fence = "````" if "```" in code else "```"
+        return (
+            f"**Task:** {entry['task']} ({entry['language']})\n\n"
+            f"**Code:**\n\n{fence}{entry['language'].lower()}\n{code}\n{fence}\n\n"
+            f"**Analysis:**\n\n{entry['analysis']}\n\n---"
+        )
+    
+    render_history(code_history, render_analysis)
 
 # Coding resources
 with st.expander("📚 Coding Resources & Tips"):
@@ -174,4 +200,6 @@ st.markdown(
         <p class='info-text'>Happy coding! 🚀</p>
     </div>""",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+finish_page_timer()
@@ -1,7 +1,13 @@
 import streamlit as st
-from utils import load_css, run_watson_granite, show_error, show_success, show_info
+from utils import load_css, render_watson_stream, show_error, show_success, show_info
+from metrics import finish_page_timer, start_page_timer
+from summarizer import map_summaries, needs_chunking
+from history import get_history, render_history
+from blobs import blob_store
 import re
 
+start_page_timer("summarizer")
+
 # Page config
 st.set_page_config(page_title="Smart Document Summarizer", page_icon="📝", layout="wide")
 
@@ -11,9 +17,8 @@ st.markdown(load_css(), unsafe_allow_html=True)
 # Title
 st.markdown("<h1 class='main-title'>Smart Document Summarizer 📝</h1>", unsafe_allow_html=True)
 
-# Initialize session state
-if 'summaries' not in st.session_state:
-    st.session_state.summaries = []
+# Summary history: the newest entries in session state, older ones on disk
+summaries = get_history("document_summaries")
 
 # Sidebar options
 st.sidebar.markdown("<h2 class='sub-title'>Summary Options</h2>", unsafe_allow_html=True)
@@ -52,7 +57,7 @@ if document_text:
 col1, col2 = st.columns([1, 5])
 with col1:
     if st.button("🧹 Clear History"):
-        st.session_state.summaries = []
+        summaries.clear()
         show_success("History cleared!")
         st.rerun()
 
@@ -60,6 +65,10 @@ with col2:
     if st.button("🚀 Generate Summary"):
         if document_text:
             try:
+                # The document is stored once however many students paste it
+                document = blob_store.put(document_text)
+                options = {"type": summary_type, "length": summary_length}
+
                 # System prompt for summarization
                 system_prompt = f"""You are an expert document summarizer.
                 Create a {summary_type.lower()} summary that is approximately {summary_length}% 
@@ -72,11 +81,40 @@ with col2:
                 
                 Make the summary clear and well-structured."""
                 
-                response = run_watson_granite(document_text, system_prompt)
+                cached = blob_store.get_derived(document, "summary", options)
+                if cached is not None:
+                    # Same document and options summarized before: no model call needed
+                    st.markdown(cached)
+                    response = cached
+                elif needs_chunking(document_text):
+                    # Long documents: summarize sections in parallel, then merge the partial summaries
+                    map_prompt = f"""You are an expert document summarizer.
+                    The text below is one section of a longer document. Summarize it faithfully,
+                    keeping its main points, key details, conclusions and key terms, so that the
+                    section summaries can later be merged into one {summary_type.lower()} summary."""
+                    
+                    with st.spinner("Summarizing document sections in parallel..."):
+                        partial_summaries = map_summaries(document_text, map_prompt)
+                    
+                    if partial_summaries.startswith("Error"):
+                        response = partial_summaries
+                    else:
+                        reduce_prompt = f"""{system_prompt}
+                        
+                        The input consists of summaries of consecutive sections of one document
+                        of {word_count} words. Merge them into a single summary of approximately
+                        {summary_length}% of the original document length."""
+                        
+                        response = render_watson_stream(partial_summaries, reduce_prompt, profile="summary")
+                else:
+                    response = render_watson_stream(document_text, system_prompt, profile="summary")
                 
                 if not response.startswith("Error"):
-                    st.session_state.summaries.append({
-                        "original": document_text,
+                    blob_store.set_derived(document, "summary", options, response)
+                    # The history keeps a reference to the stored document, not a copy
+                    summaries.append({
+                        "document": document,
+                        "original_length": len(document_text),
                         "summary": response,
                         "type": summary_type,
                         "length": summary_length
@@ -91,25 +129,28 @@ with col2:
             show_error("Please enter the document text first!")
 
 # Display summaries
-if st.session_state.summaries:
+if summaries:
     st.markdown("<h2 class='sub-title'>Generated Summaries</h2>", unsafe_allow_html=True)
     
-    for idx, summary in enumerate(reversed(st.session_state.summaries)):
-        with st.expander(f"Summary {len(st.session_state.summaries) - idx} - {summary['type']}"):
-            st.markdown(
-                f"""<div class='card'>
+    def render_summary(summary):
+        original = summary.get('original')
+        if original is None:
+            original = (blob_store.get(summary['document']) or "Original text is no longer available.")[:500]
+        # The summary is markdown; the blank lines around it end the HTML block
+        # so that its headings and lists are rendered
+        return f"""<div class='card'>
                     <p><strong>Original Text:</strong></p>
                     <div style='max-height: 200px; overflow-y: auto; padding: 1rem; 
                               background-color: #1E1E1E; border-radius: 0.5rem;'>
-                        {summary['original'][:500]}{'...' if len(summary['original']) > 500 else ''}
+                        {original}{'...' if summary['original_length'] > 500 else ''}
                     </div>
                     <div class='response-area'>
-                        <p><strong>Summary ({summary['length']}% length):</strong></p>
-                        {summary['summary']}
-                    </div>
-                </div>""",
-                unsafe_allow_html=True
-            )
+                        <p><strong>Summary ({summary['length']}% length):</strong></p>\n\n""" + (
+            f"{summary['summary']}\n\n</div></div>"
+        )
+    
+    render_history(summaries, render_summary,
+                   title=lambda summary, number: f"Summary {number} - {summary['type']}")
 
 # ... existing code ...
 
@@ -118,7 +159,7 @@ with st.expander("📚 Tips for Better Summaries"):
     st.markdown("""
     ### Tips for Better Results:
     1. **Clean your text**: Remove any unnecessary formatting or special characters
-    2. **Break into sections**: If summarizing a long document, consider breaking it into smaller sections
+    2. **Long documents are fine**: Long texts are split into sections that are summarized in parallel and then merged
     3. **Choose the right summary type**:
         - *Concise*: For quick overview
         - *Detailed*: For comprehensive understanding
@@ -126,4 +167,6 @@ with st.expander("📚 Tips for Better Summaries"):
         - *Academic*: For formal documents
         - *Simple Language*: For general audience
     4. **Adjust length**: Use the slider to find the optimal summary length for your needs
-    """)
\ No newline at end of file
+    """)
+
+finish_page_timer()
@@ -1,5 +1,8 @@
 import streamlit as st
 from utils import load_css, run_watson_granite
+from metrics import finish_page_timer, start_page_timer
+
+start_page_timer("study_planner")
 
 # Page config
 st.set_page_config(
@@ -66,7 +69,7 @@ if submit_button:
             5. Progress tracking metrics
             """
 
-            response = run_watson_granite(prompt)
+            response = run_watson_granite(prompt, profile="study_plan")
 
             st.markdown("<h2 class='sub-title'>Your Personalized Study Plan</h2>", unsafe_allow_html=True)
             st.markdown(f"""<div class='response-area'>{response}</div>""", unsafe_allow_html=True)
@@ -109,4 +112,6 @@ with col3:
             <p>Regularly review and adjust your study plan based on your progress.</p>
         </div>""",
         unsafe_allow_html=True
-    )
\ No newline at end of file
+    )
+
+finish_page_timer()
@@ -1,5 +1,12 @@
 import streamlit as st
-from utils import load_css, run_watson_granite, show_error, show_success
+from utils import load_css, render_watson_stream, show_error, show_success
+from metrics import finish_page_timer, start_page_timer
+from qa_index import question_index
+from prompts import EXAMPLE_QUESTIONS, example_question_prompt
+from conversation import ConversationContext, is_follow_up
+from history import get_history, render_history
+
+start_page_timer("qa")
 
 # Page config
 st.set_page_config(
@@ -24,20 +31,14 @@ st.markdown(
 )
 
 # Initialize session state
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+# Conversation history: the newest entries in session state, older ones on disk
+chat_history = get_history("chat_history")
+if "qa_context" not in st.session_state:
+    st.session_state.qa_context = ConversationContext()
 
 # Example questions
 st.markdown("<h2 class='sub-title'>Example Questions</h2>", unsafe_allow_html=True)
 
-example_questions = [
-    "Explain the concept of photosynthesis in simple terms.",
-    "What are the key differences between Python and Java?",
-    "How do I solve quadratic equations?",
-    "What were the main causes of World War II?",
-    "Explain the law of conservation of energy."
-]
-
 # Main interface
 col1, col2 = st.columns([3, 1])
 
@@ -50,16 +51,28 @@ with col1:
     if st.button("🤔 Get Answer", use_container_width=True):
         if user_question:
             with st.spinner("Thinking..."):
-                chat_context = "\n".join([f"Q: {q}\nA: {a}" for q, a in st.session_state.chat_history[-3:]])
-                prompt = f"""Context of previous questions (if any):
-                {chat_context}
-                
-                Current question: {user_question}
-                
-                Please provide a clear, detailed, and educational answer. Include examples where appropriate."""
-                
-                response = run_watson_granite(prompt)
-                st.session_state.chat_history.append((user_question, response))
+                # Follow-ups are answered in the context of this conversation. Standalone
+                # questions do not need it, so they are answered from, and added to, the shared index
+                follow_up = is_follow_up(user_question)
+                chat_context = st.session_state.qa_context.render() if follow_up else ""
+                # Reuse the answer to a near-identical question asked before, if there is one
+                match = None if follow_up else question_index.lookup(user_question)
+                if match:
+                    response = match["answer"]
+                else:
+                    prompt = f"""Context of previous questions (if any):
+                    {chat_context}
+                    
+                    Current question: {user_question}
+                    
+                    Please provide a clear, detailed, and educational answer. Include examples where appropriate."""
+                    
+                    response = render_watson_stream(prompt, profile="answer")
+                    if not response.startswith("Error") and not follow_up:
+                        question_index.add(user_question, response)
+                if not response.startswith("Error"):
+                    st.session_state.qa_context.add_turn(user_question, response)
+                chat_history.append({"question": user_question, "answer": response})
                 show_success("Response generated!")
                 st.rerun()
         else:
@@ -68,38 +81,50 @@ with col1:
 with col2:
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("<p><strong>Try these examples:</strong></p>", unsafe_allow_html=True)
-    for question in example_questions:
+    for question in EXAMPLE_QUESTIONS:
         if st.button(f"📝 {question}", key=f"example_{question}", use_container_width=True):
             with st.spinner("Thinking..."):
-                prompt = f"""Please provide a clear, detailed, and educational answer to this question:
-                {question}
-                
-                Include examples where appropriate and make it easy to understand."""
-                
-                response = run_watson_granite(prompt)
-                st.session_state.chat_history.append((question, response))
+                match = question_index.lookup(question)
+                if match:
+                    response = match["answer"]
+                else:
+                    prompt = example_question_prompt(question)
+                    
+                    response = render_watson_stream(prompt, profile="answer")
+                    if not response.startswith("Error"):
+                        question_index.add(question, response)
+                if not response.startswith("Error"):
+                    st.session_state.qa_context.add_turn(question, response)
+                chat_history.append({"question": question, "answer": response})
                 show_success("Response generated!")
                 st.rerun()
 
 # Display chat history
-if st.session_state.chat_history:
+if chat_history:
     st.markdown("<h2 class='sub-title'>Conversation History</h2>", unsafe_allow_html=True)
     
-    for question, answer in reversed(st.session_state.chat_history):
-        st.markdown(
-            f"""<div class='card'>
+    index_stats = question_index.stats()
+    st.markdown(
+        f"<p class='info-text'>⚡ {index_stats['served']} of {index_stats['lookups']} questions were answered "
+        f"instantly from {index_stats['entries']} previously answered questions.</p>",
+        unsafe_allow_html=True
+    )
+    
+    def render_turn(entry):
+        return f"""<div class='card'>
                 <h4>Question:</h4>
-                <p>{question}</p>
+                <p>{entry['question']}</p>
                 <h4>Answer:</h4>
-                <div class='response-area'>{answer}</div>
-            </div>""",
-            unsafe_allow_html=True
-        )
+                <div class='response-area'>{entry['answer']}</div>
+            </div>"""
+    
+    render_history(chat_history, render_turn)
 
     col1, col2 = st.columns([1, 5])
     with col1:
         if st.button("🧹 Clear History"):
-            st.session_state.chat_history = []
+            chat_history.clear()
+            st.session_state.qa_context.clear()
             show_success("History cleared!")
             st.rerun()
 
@@ -142,4 +167,6 @@ st.markdown(
         <p class='info-text'>Keep asking, keep learning! ❓</p>
     </div>""",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+finish_page_timer()
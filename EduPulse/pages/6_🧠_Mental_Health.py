@@ -1,7 +1,11 @@
 import streamlit as st
 from utils import load_css, run_watson_granite
+from metrics import finish_page_timer, start_page_timer
+from prompts import SUPPORT_TOPICS, guidance_prompt
 import random
 
+start_page_timer("mental_health")
+
 # Page config
 st.set_page_config(
     page_title="EduNexus 2.0 - Mental Health Support",
@@ -65,7 +69,7 @@ with col2:
         provide a supportive and encouraging message along with 2-3 practical coping strategies. 
         Keep the tone warm and empathetic."""
         
-        response = run_watson_granite(prompt)
+        response = run_watson_granite(prompt, profile="support")
         st.markdown(f"""<div class='response-area'>{response}</div>""", unsafe_allow_html=True)
 
 # Relaxation Techniques
@@ -123,26 +127,14 @@ st.markdown(
 )
 
 # Guided Support
-support_topics = [
-    "Managing Academic Stress",
-    "Dealing with Test Anxiety",
-    "Balancing Study and Life",
-    "Improving Sleep Habits",
-    "Building Self-Confidence"
-]
-
 st.markdown("<h2 class='sub-title'>Guided Support</h2>", unsafe_allow_html=True)
 
-selected_topic = st.selectbox("Choose a topic you'd like guidance with:", support_topics)
+selected_topic = st.selectbox("Choose a topic you'd like guidance with:", SUPPORT_TOPICS)
 
 if st.button("Get Guidance"):
-    prompt = f"""Provide practical advice and strategies for: {selected_topic}
-    Include:
-    1. Understanding the challenge
-    2. Immediate coping strategies
-    3. Long-term solutions
-    4. When to seek additional help
-    Keep the tone supportive and encouraging."""
+    prompt = guidance_prompt(selected_topic)
     
-    response = run_watson_granite(prompt)
-    st.markdown(f"""<div class='response-area'>{response}</div>""", unsafe_allow_html=True)
\ No newline at end of file
+    response = run_watson_granite(prompt, profile="guidance")
+    st.markdown(f"""<div class='response-area'>{response}</div>""", unsafe_allow_html=True)
+
+finish_page_timer()
@@ -1,5 +1,11 @@
 import streamlit as st
 from utils import load_css, run_watson_granite
+from metrics import finish_page_timer, start_page_timer
+from languages import LANGUAGES, is_in_language
+from translation_memory import translate_text
+from prompts import VOCABULARY_TOPICS, vocabulary_prompt
+
+start_page_timer("multi_language")
 
 # Page config
 st.set_page_config(
@@ -24,18 +30,7 @@ st.markdown(
 )
 
 # Language Selection
-languages = {
-    "English": "en",
-    "Spanish": "es",
-    "French": "fr",
-    "German": "de",
-    "Chinese": "zh",
-    "Hindi": "hi",
-    "Arabic": "ar",
-    "Japanese": "ja",
-    "Korean": "ko",
-    "Russian": "ru"
-}
+languages = LANGUAGES
 
 # Language Settings
 col1, col2 = st.columns(2)
@@ -44,6 +39,12 @@ with col1:
 with col2:
     output_language = st.selectbox("Select Your Output Language", list(languages.keys()), index=0)
 
+fast_mode = st.checkbox(
+    "⚡ Fast mode: answer directly in the output language",
+    value=True,
+    help="Uses a single request instead of translating the question and the answer separately"
+)
+
 # Question Input
 user_input = st.text_area(
     f"Enter your question in {input_language}",
@@ -55,35 +56,33 @@ user_input = st.text_area(
 if st.button("Get Answer"):
     if user_input:
         with st.spinner("Processing your question..."):
-            # First, translate to English if not already in English
-            if input_language != "English":
-                translation_prompt = f"""Translate the following text from {input_language} to English:
+            if fast_mode:
+                # One request: understand the question and answer in the output language directly
+                direct_prompt = f"""Question (written in {input_language}): {user_input}
                 
-                Text: {user_input}
+                Please provide a clear and detailed answer. Write the whole answer in {output_language}."""
                 
-                Provide only the English translation without any explanations."""
-                
-                english_query = run_watson_granite(translation_prompt)
+                final_answer = run_watson_granite(direct_prompt, profile="answer")
+            
+            # First, translate to English if not already in English
+            elif input_language != "English" and not is_in_language(user_input, "English"):
+                english_query = translate_text(user_input, input_language, "English")
             else:
                 english_query = user_input
             
-            # Get the answer in English
-            answer_prompt = f"""Question: {english_query}
-            Please provide a clear and detailed answer."""
-            
-            english_answer = run_watson_granite(answer_prompt)
-            
-            # Translate answer if needed
-            if output_language != "English":
-                final_translation_prompt = f"""Translate the following text from English to {output_language}:
-                
-                Text: {english_answer}
+            if not fast_mode:
+                # Get the answer in English
+                answer_prompt = f"""Question: {english_query}
+                Please provide a clear and detailed answer."""
                 
-                Provide only the {output_language} translation without any explanations."""
+                english_answer = run_watson_granite(answer_prompt, profile="answer")
                 
-                final_answer = run_watson_granite(final_translation_prompt)
-            else:
-                final_answer = english_answer
+                # Translate answer if needed, unless the model already answered in the output language.
+                # Sentences translated before for other students come from the translation memory.
+                if output_language != "English" and not is_in_language(english_answer, output_language):
+                    final_answer = translate_text(english_answer, "English", output_language)
+                else:
+                    final_answer = english_answer
             
             # Display results
             st.markdown("<h2 class='sub-title'>Your Answer</h2>", unsafe_allow_html=True)
@@ -114,18 +113,13 @@ st.markdown("<h3>Vocabulary Builder</h3>", unsafe_allow_html=True)
 
 topic = st.selectbox(
     "Select a topic to learn vocabulary:",
-    ["Academic", "Science", "Technology", "Mathematics", "Literature", "History"]
+    VOCABULARY_TOPICS
 )
 
 if st.button("Generate Vocabulary List"):
-    vocab_prompt = f"""Create a vocabulary list for {topic} with 10 important terms.
-    For each term, provide:
-    1. The word in {output_language}
-    2. Its English translation
-    3. A brief definition in {output_language}
-    4. An example sentence in {output_language}"""
+    vocab_prompt = vocabulary_prompt(topic, output_language)
     
-    vocab_response = run_watson_granite(vocab_prompt)
+    vocab_response = run_watson_granite(vocab_prompt, profile="vocabulary")
     st.markdown(f"""<div class='response-area'>{vocab_response}</div>""", unsafe_allow_html=True)
 
 # Practice Exercises
@@ -189,4 +183,6 @@ with tips_col2:
             </ul>
         </div>""",
         unsafe_allow_html=True
-    )
\ No newline at end of file
+    )
+
+finish_page_timer()
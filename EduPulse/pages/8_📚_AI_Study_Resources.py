@@ -1,7 +1,13 @@
 import streamlit as st
-from utils import load_css, run_watson_granite
+from utils import load_css, submit_generation, show_job, follow_jobs, show_error, show_success
+from metrics import finish_page_timer, start_page_timer
+from jobs import job_queue
+from history import get_history
+from datetime import datetime
 import json
 
+start_page_timer("study_resources")
+
 # Page config
 st.set_page_config(
     page_title="EduNexus 2.0 - AI Study Resources",
@@ -24,6 +30,11 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Initialize session state for resources in progress; finished ones go to the history
+if 'resource_jobs' not in st.session_state:
+    st.session_state.resource_jobs = []
+resource_history = get_history("resource_history")
+
 # Resource Type Selection
 st.markdown("<h2 class='sub-title'>Choose Resource Type</h2>", unsafe_allow_html=True)
 
@@ -161,20 +172,48 @@ if st.button("Generate Study Resource"):
                 {' 4. Explanations' if include_explanations else ''}
                 """
 
-            # Generate content
-            response = run_watson_granite(prompt)
-            
-            # Display generated content
-            st.markdown("<h2 class='sub-title'>Your Generated Resource</h2>", unsafe_allow_html=True)
-            st.markdown(f"""<div class='response-area'>{response}</div>""", unsafe_allow_html=True)
-            
-            # Download button
-            st.download_button(
-                label="Download Resource",
-                data=response,
-                file_name=f"{subject.lower().replace(' ', '_')}_{resource_type.lower().replace(' ', '_')}.txt",
-                mime="text/plain"
-            )
+            # Generate in the background so the page stays responsive and the result survives page switches
+            job_id = submit_generation(prompt, profile="study_resource", label=resource_type)
+            st.session_state.resource_jobs.append({
+                "job_id": job_id,
+                "type": resource_type,
+                "subject": subject
+            })
+
+# Resources in progress; finished ones move to the history
+watched = []
+for entry in list(st.session_state.resource_jobs):
+    job = job_queue.get(entry["job_id"])
+    if job is not None and not job.finished:
+        watched.append(show_job(entry["job_id"], f"Generating {entry['type']} for {entry['subject']}..."))
+        continue
+    st.session_state.resource_jobs.remove(entry)
+    if job is None:
+        show_error("A resource in progress is no longer available. Please generate it again.")
+    elif job.state == "done":
+        resource_history.append({
+            "type": entry["type"],
+            "subject": entry["subject"],
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "content": job.text()
+        })
+        show_success(f"Your {entry['type']} is ready!")
+    elif job.state == "failed":
+        show_error(job.error)
+
+# Latest generated resource
+if resource_history:
+    latest = resource_history.latest()
+    st.markdown("<h2 class='sub-title'>Your Generated Resource</h2>", unsafe_allow_html=True)
+    st.markdown(latest["content"])
+    
+    # Download button
+    st.download_button(
+        label="Download Resource",
+        data=latest["content"],
+        file_name=f"{latest['subject'].lower().replace(' ', '_')}_{latest['type'].lower().replace(' ', '_')}.txt",
+        mime="text/plain"
+    )
 
 # Tips Section
 st.markdown("<h2 class='sub-title'>Study Tips</h2>", unsafe_allow_html=True)
@@ -211,13 +250,9 @@ with col3:
 # Resource Library
 st.markdown("<h2 class='sub-title'>Recently Generated Resources</h2>", unsafe_allow_html=True)
 
-# Initialize session state for resource history
-if 'resource_history' not in st.session_state:
-    st.session_state.resource_history = []
-
 # Display recent resources
-if st.session_state.resource_history:
-    for resource in st.session_state.resource_history[-5:]:  # Show last 5 resources
+if resource_history:
+    for resource in resource_history.page(0, 5):  # Show last 5 resources
         st.markdown(
             f"""<div class='card'>
                 <h4>{resource['type']}: {resource['subject']}</h4>
@@ -226,4 +261,10 @@ if st.session_state.resource_history:
             unsafe_allow_html=True
         )
 else:
-    st.info("No resources generated yet. Create your first resource above!")
\ No newline at end of file
+    st.info("No resources generated yet. Create your first resource above!")
+
+finish_page_timer()
+
+# Keep the resources in progress up to date. This waits for the jobs, so it runs
+# after the page timer, which measures the script rerun only.
+follow_jobs(watched)
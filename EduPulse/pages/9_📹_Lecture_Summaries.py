@@ -1,8 +1,15 @@
 import streamlit as st
-from utils import load_css, run_watson_granite, show_error, show_success, show_info
-from youtube_transcript_api import YouTubeTranscriptApi
+from utils import load_css, generate_stream, show_job, follow_jobs, show_error, show_success, show_info
+from metrics import finish_page_timer, start_page_timer
+from jobs import job_queue
+from transcripts import get_transcript, group_into_chapters, parse_video_id, transcript_to_text
+from summarizer import chapters_complete, needs_chunking, summarize_chapters, summarize_long_text
+from history import get_history, render_history
+from blobs import blob_store, derive
 import json
 
+start_page_timer("lecture_summaries")
+
 # Page config
 st.set_page_config(page_title="Lecture Summaries", page_icon="📹", layout="wide")
 
@@ -13,8 +20,10 @@ st.markdown(load_css(), unsafe_allow_html=True)
 st.markdown("<h1 class='main-title'>Lecture Summaries 📹</h1>", unsafe_allow_html=True)
 
 # Initialize session state
-if 'summaries' not in st.session_state:
-    st.session_state.summaries = []
+summaries = get_history("lecture_summaries")
+# Summaries still being generated in the background
+if 'lecture_jobs' not in st.session_state:
+    st.session_state.lecture_jobs = []
 
 # Description
 st.markdown(
@@ -41,15 +50,29 @@ summary_length = st.sidebar.slider(
     step=5
 )
 
+chaptered = st.sidebar.checkbox(
+    "Chaptered summary with timestamps",
+    help="Split the lecture into time-based chapters that are summarized in parallel"
+)
+
+chapter_minutes = st.sidebar.slider(
+    "Chapter length (minutes)",
+    min_value=2,
+    max_value=20,
+    value=5,
+    disabled=not chaptered
+)
+
 # Main interface
 youtube_url = st.text_input("📺 YouTube Video URL", placeholder="Paste the video URL here...")
 
-# Process URL
+# Process URL. Transcripts are cached per video, so reruns do not hit YouTube again.
+transcript_text = None
 if youtube_url:
     try:
-        video_id = youtube_url.split('v=')[1].split('&')[0] if 'youtube.com' in youtube_url else youtube_url.split('youtu.be/')[1]
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        transcript_text = " ".join([item['text'] for item in transcript])
+        video_id = parse_video_id(youtube_url)
+        transcript = get_transcript(video_id)
+        transcript_text = transcript_to_text(transcript)
         show_success("Transcript fetched successfully!")
     except Exception as e:
         show_error(f"Error fetching transcript: {str(e)}")
@@ -59,7 +82,7 @@ if youtube_url:
 col1, col2 = st.columns([1, 5])
 with col1:
     if st.button("🧹 Clear History"):
-        st.session_state.summaries = []
+        summaries.clear()
         show_success("History cleared!")
         st.rerun()
 
@@ -79,39 +102,108 @@ with col2:
                 
                 Make the summary clear and well-structured."""
 
-                response = run_watson_granite(transcript_text, system_prompt)
+                # Lectures watched by many students are summarized once per set of options
+                transcript_ref = blob_store.put(transcript_text)
+                options = {"type": summary_type, "length": summary_length}
+                if chaptered:
+                    # Chapter titles link into the video, so they depend on it too
+                    options.update(chapter_minutes=chapter_minutes, video=video_id)
+                cached = blob_store.get_derived(transcript_ref, "lecture_summary", options)
 
-                if not response.startswith("Error"):
-                    st.session_state.summaries.append({
+                if cached is not None:
+                    summaries.append({
                         "url": youtube_url,
-                        "summary": response,
-                        "type": summary_type,
+                        "summary": cached,
+                        "type": f"{summary_type} · Chaptered" if chaptered else summary_type,
                         "length": summary_length
                     })
                     show_success("Summary generated successfully!")
+                elif chaptered:
+                    chapter_prompt = f"""You are an expert in summarizing educational content.
+                    The text below is one chapter of a lecture transcript. Create a {summary_type.lower()}
+                    summary that is approximately {summary_length}% of the chapter's length, covering
+                    its main concepts, key points, important examples and key terms.
+                    Do not add a title; it is added for you."""
+                    
+                    chapters = group_into_chapters(transcript, chapter_minutes * 60)
+                    generation = (summarize_chapters, video_id, chapters, chapter_prompt)
+                    message = f"Summarizing {len(chapters)} chapters in parallel..."
+                elif needs_chunking(transcript_text):
+                    # Long lectures: summarize transcript sections in parallel, then merge them
+                    map_prompt = f"""You are an expert in summarizing educational content.
+                    The text below is one section of a longer lecture transcript. Summarize it faithfully,
+                    keeping its main concepts, key points, examples and key terms."""
+                    
+                    reduce_prompt = f"""{system_prompt}
+                        
+                        The input consists of summaries of consecutive sections of one lecture.
+                        Merge them into a single summary of approximately {summary_length}% of the
+                        original lecture length."""
+                    
+                    generation = (summarize_long_text, transcript_text, map_prompt, reduce_prompt)
+                    message = "Summarizing transcript sections in parallel..."
                 else:
-                    show_error(f"Summarization failed: {response}")
+                    generation = (generate_stream, transcript_text, system_prompt, "summary")
+                    message = "Generating summary..."
+
+                if cached is None:
+                    # The summary is generated in the background and survives reruns and page switches.
+                    # Once done it is cached for the next student who summarizes this lecture,
+                    # unless a chapter is missing, so that the next try fills it in.
+                    job_id = job_queue.submit(derive, transcript_ref, "lecture_summary", options, *generation,
+                                              cache_if=chapters_complete if chaptered else None,
+                                              label="lecture summary")
+                    st.session_state.lecture_jobs.append({
+                        "job_id": job_id,
+                        "message": message,
+                        "url": youtube_url,
+                        "type": f"{summary_type} · Chaptered" if chaptered else summary_type,
+                        "length": summary_length
+                    })
             except Exception as e:
                 show_error(f"An error occurred: {str(e)}")
         else:
             show_error("Please provide a valid YouTube URL with available transcript.")
 
+# Summaries in progress; finished ones move to the history
+watched = []
+for entry in list(st.session_state.lecture_jobs):
+    job = job_queue.get(entry["job_id"])
+    if job is not None and not job.finished:
+        watched.append(show_job(entry["job_id"], entry["message"]))
+        continue
+    st.session_state.lecture_jobs.remove(entry)
+    if job is None:
+        show_error("A summary in progress is no longer available. Please generate it again.")
+    elif job.state == "done":
+        summaries.append({
+            "url": entry["url"],
+            "summary": job.text(),
+            "type": entry["type"],
+            "length": entry["length"]
+        })
+        show_success("Summary generated successfully!")
+    elif job.state == "failed":
+        show_error(f"Summarization failed: {job.error}")
+
 # Display summaries
-if st.session_state.summaries:
+if summaries:
     st.markdown("<h2 class='sub-title'>Generated Summaries</h2>", unsafe_allow_html=True)
     
-    for idx, summary in enumerate(reversed(st.session_state.summaries)):
-        with st.expander(f"Summary {len(st.session_state.summaries) - idx} - {summary['type']}"):
-            st.markdown(
-                f"""<div class='card'>
-                    <p><strong>Video URL:</strong> <a href="{summary['url']}" target="_blank">{summary['url']}</a></p>
-                    <div class='response-area'>
-                        <p><strong>Summary ({summary['length']}% length):</strong></p>
-                        {summary['summary']}
-                    </div>
-                </div>""",
-                unsafe_allow_html=True
-            )
+    def render_summary(summary):
+        # The summary is markdown; the blank lines around it end the HTML block
+        # so that its headings and links are rendered
+        return (
+            f"<div class='card'>"
+            f"<p><strong>Video URL:</strong> <a href=\"{summary['url']}\" target=\"_blank\">{summary['url']}</a></p>"
+            f"<div class='response-area'>"
+            f"<p><strong>Summary ({summary['length']}% length):</strong></p>\n\n"
+            f"{summary['summary']}\n\n"
+            f"</div></div>"
+        )
+    
+    render_history(summaries, render_summary,
+                   title=lambda summary, number: f"Summary {number} - {summary['type']}")
 
 # Tips section
 with st.expander("📚 Tips for Better Summaries"):
@@ -135,4 +227,10 @@ st.markdown(
         <p class='info-text'>Happy learning! 📚</p>
     </div>""",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+finish_page_timer()
+
+# Keep the summaries in progress up to date. This waits for the jobs, so it runs
+# after the page timer, which measures the script rerun only.
+follow_jobs(watched)
@@ -0,0 +1,49 @@
+# Static prompts shared by the pages and the server warm-up. Answers are cached by
+# the exact prompt text, so a page and the warm-up must build the prompt the same way.
+
+# Example questions offered on the Real-Time Q&A page
+EXAMPLE_QUESTIONS = [
+    "Explain the concept of photosynthesis in simple terms.",
+    "What are the key differences between Python and Java?",
+    "How do I solve quadratic equations?",
+    "What were the main causes of World War II?",
+    "Explain the law of conservation of energy."
+]
+
+# Topics of the Guided Support section on the Mental Health page
+SUPPORT_TOPICS = [
+    "Managing Academic Stress",
+    "Dealing with Test Anxiety",
+    "Balancing Study and Life",
+    "Improving Sleep Habits",
+    "Building Self-Confidence"
+]
+
+# Topics of the Vocabulary Builder on the Multi-Language page
+VOCABULARY_TOPICS = ["Academic", "Science", "Technology", "Mathematics", "Literature", "History"]
+
+def example_question_prompt(question):
+    """Prompt for an example question on the Q&A page"""
+    return f"""Please provide a clear, detailed, and educational answer to this question:
+                    {question}
+                    
+                    Include examples where appropriate and make it easy to understand."""
+
+def guidance_prompt(topic):
+    """Prompt for a Guided Support topic"""
+    return f"""Provide practical advice and strategies for: {topic}
+    Include:
+    1. Understanding the challenge
+    2. Immediate coping strategies
+    3. Long-term solutions
+    4. When to seek additional help
+    Keep the tone supportive and encouraging."""
+
+def vocabulary_prompt(topic, output_language):
+    """Prompt for a vocabulary list in the chosen language"""
+    return f"""Create a vocabulary list for {topic} with 10 important terms.
+    For each term, provide:
+    1. The word in {output_language}
+    2. Its English translation
+    3. A brief definition in {output_language}
+    4. An example sentence in {output_language}"""
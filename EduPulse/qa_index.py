@@ -0,0 +1,119 @@
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# Minimum cosine similarity for reusing a stored answer
+SIMILARITY_THRESHOLD = float(os.getenv('EDUPULSE_QA_SIMILARITY', '0.88'))
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Roman numerals ("World War II", "Henry VIII"). A lone "I" only counts at the end
+# of a clause, so the pronoun in "Can I ..." is not one.
+_ROMAN_PATTERN = re.compile(r"\bM{0,4}(?:CM|CD|D?C{0,3})(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})\b", re.IGNORECASE)
+
+def _features(text):
+    """Word unigrams, word bigrams and character trigrams of a question"""
+    words = _TOKEN_PATTERN.findall(text.lower())
+    features = list(words)
+    features += [f"{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [f"~{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+def _anchors(text):
+    """Numbers and roman numerals of a question, which a reused answer must share exactly.
+
+    "World War I" and "World War II" are nearly identical as text but not as questions.
+    """
+    anchors = {token for token in _TOKEN_PATTERN.findall(text.lower()) if any(c.isdigit() for c in token)}
+    for match in _ROMAN_PATTERN.finditer(text):
+        numeral = match.group().upper()
+        if not numeral or numeral == "I" and re.match(r"\s*[A-Za-z]", text[match.end():]):
+            continue
+        anchors.add(numeral)
+    return frozenset(anchors)
+
+class QuestionIndex:
+    """Local TF-IDF index over past questions, built on hashed features.
+
+    Answers are shared by every session of the server process. The oldest entries
+    are replaced once the index is full.
+    """
+
+    def __init__(self, max_entries=2000, dimensions=2048):
+        self.max_entries = max_entries
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self._document_frequency = np.zeros(dimensions, dtype=np.float32)
+        self._entries = []
+        self._next_slot = 0
+        self.lookups = 0
+        self.served = 0
+
+    def _vectorize(self, text):
+        """Sublinear term frequencies over signed hash buckets"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in _features(text):
+            digest = zlib.crc32(feature.encode('utf-8'))
+            vector[digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        nonzero = vector != 0
+        vector[nonzero] = np.sign(vector[nonzero]) * (1.0 + np.log(np.abs(vector[nonzero])))
+        return vector
+
+    def add(self, question, answer):
+        """Store an answer for a question"""
+        vector = self._vectorize(question)
+        if not vector.any():
+            return
+        with self._lock:
+            if len(self._entries) < self.max_entries:
+                if len(self._entries) == len(self._vectors):
+                    capacity = min(self.max_entries, max(64, 2 * len(self._vectors)))
+                    grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+                    grown[:len(self._vectors)] = self._vectors
+                    self._vectors = grown
+                slot = len(self._entries)
+                self._entries.append((question, answer, _anchors(question)))
+            else:
+                slot = self._next_slot
+                self._next_slot = (self._next_slot + 1) % self.max_entries
+                self._document_frequency -= self._vectors[slot] != 0
+                self._entries[slot] = (question, answer, _anchors(question))
+            self._vectors[slot] = vector
+            self._document_frequency += vector != 0
+
+    def lookup(self, question, threshold=SIMILARITY_THRESHOLD):
+        """Return the best stored match above the threshold as a dict, or None"""
+        query = self._vectorize(question)
+        anchors = _anchors(question)
+        with self._lock:
+            self.lookups += 1
+            count = len(self._entries)
+            if count == 0 or not query.any():
+                return None
+
+            idf = np.log((1.0 + count) / (1.0 + self._document_frequency)) + 1.0
+            weighted_query = query * idf
+            weighted = self._vectors[:count] * idf
+            norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(weighted_query)
+            scores = (weighted @ weighted_query) / np.maximum(norms, 1e-9)
+            # Best match above the threshold that asks about the same numbers
+            candidates = np.flatnonzero(scores >= threshold)
+            for best in candidates[np.argsort(-scores[candidates])]:
+                matched_question, answer, matched_anchors = self._entries[best]
+                if matched_anchors == anchors:
+                    self.served += 1
+                    return {"question": matched_question, "answer": answer, "score": float(scores[best])}
+            return None
+
+    def stats(self):
+        """Return the number of stored questions and how many answers were reused"""
+        with self._lock:
+            return {"entries": len(self._entries), "lookups": self.lookups, "served": self.served}
+
+question_index = QuestionIndex(max_entries=int(os.getenv('EDUPULSE_QA_INDEX_SIZE', '2000')))
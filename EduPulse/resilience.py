@@ -0,0 +1,243 @@
+import os
+import random
+import threading
+import time
+
+from scheduler import FairScheduler
+
+# Status codes worth retrying: rate limiting and temporary server trouble
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504, 520}
+
+# Status codes that mean the service is overloaded and concurrency should drop
+OVERLOAD_STATUS_CODES = {429, 503}
+
+RETRY_ATTEMPTS = int(os.getenv('EDUPULSE_RETRY_ATTEMPTS', '4'))
+RETRY_BASE_DELAY = float(os.getenv('EDUPULSE_RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('EDUPULSE_RETRY_MAX_DELAY', '8'))
+
+class ServiceUnavailableError(RuntimeError):
+    """Raised without calling WatsonX when the service is known to be unhealthy or saturated"""
+
+def status_code_of(error):
+    """Return the HTTP status code carried by an exception, if any"""
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    try:
+        return int(status_code) if status_code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def is_transient_error(error):
+    """Check whether a failed call is worth retrying"""
+    if isinstance(error, ServiceUnavailableError):
+        return False
+    status_code = status_code_of(error)
+    if status_code is not None:
+        return status_code in TRANSIENT_STATUS_CODES
+    # Timeouts and dropped connections carry no response
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__module__.startswith('httpx')
+
+def is_overload_error(error):
+    return status_code_of(error) in OVERLOAD_STATUS_CODES
+
+def retry_delay(attempt, error=None):
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends it"""
+    response = getattr(error, 'response', None)
+    retry_after = getattr(response, 'headers', {}).get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+class TokenBucket:
+    """Request rate limiter shared by every session, sized to the plan quota.
+
+    It never blocks: the fair scheduler takes tokens as it grants slots, so requests
+    over the rate wait in the scheduler queue and are served in its order.
+    """
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take one token if there is one; otherwise return the seconds until the next one"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate_per_second
+
+class CircuitBreaker:
+    """Fail fast after repeated transient failures, then let one trial call through"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise ServiceUnavailableError instead of calling an unhealthy service"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise ServiceUnavailableError("WatsonX is temporarily unavailable, please try again shortly")
+                self.state = "half_open"
+                self._trial_running = False
+            if self.state == "half_open":
+                if self._trial_running:
+                    raise ServiceUnavailableError("WatsonX is recovering, please try again shortly")
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_running = False
+
+    def release_trial(self):
+        """Give up a trial call that ended without telling us anything"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+class AdaptiveConcurrencyLimiter:
+    """Limit on parallel upstream calls that follows observed latency (AIMD).
+
+    The limit grows by one per window of fast calls and shrinks multiplicatively
+    when recent latency rises well above the long-run baseline or the service
+    reports overload.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=32, latency_tolerance=2.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self._baseline = None
+        self._recent = None
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._baseline = seconds if self._baseline is None else 0.95 * self._baseline + 0.05 * seconds
+            self._recent = seconds if self._recent is None else 0.7 * self._recent + 0.3 * seconds
+            if self._recent > self.latency_tolerance * self._baseline:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def record_overload(self):
+        with self._lock:
+            self.limit = max(self.min_limit, self.limit * 0.5)
+
+rate_limiter = TokenBucket(
+    rate_per_second=float(os.getenv('EDUPULSE_RATE_LIMIT_PER_SECOND', '8')),
+    capacity=float(os.getenv('EDUPULSE_RATE_LIMIT_BURST', '16'))
+)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('EDUPULSE_BREAKER_FAILURES', '5')),
+    reset_timeout=float(os.getenv('EDUPULSE_BREAKER_RESET_SECONDS', '30'))
+)
+concurrency_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=int(os.getenv('EDUPULSE_UPSTREAM_CONCURRENCY', '8')),
+    max_limit=int(os.getenv('EDUPULSE_UPSTREAM_CONCURRENCY_MAX', '32'))
+)
+# Decides who gets the next slot when every slot under the concurrency limit is taken
+# or the request rate is used up, so rate-limit waits are fair and report their position too
+upstream_scheduler = FairScheduler(lambda: concurrency_limiter.limit, rate_limiter=rate_limiter)
+
+def _record_outcome(error, started_at):
+    if error is None:
+        circuit_breaker.record_success()
+        concurrency_limiter.record_latency(time.monotonic() - started_at)
+    elif is_transient_error(error):
+        circuit_breaker.record_failure()
+        if is_overload_error(error):
+            concurrency_limiter.record_overload()
+    else:
+        # The service answered; the request itself was bad
+        circuit_breaker.record_success()
+
+def call_with_resilience(call, lane="interactive"):
+    """Run an upstream call behind the fair scheduler, rate limiter and circuit breaker,
+    retrying transient failures with jittered exponential backoff"""
+    for attempt in range(RETRY_ATTEMPTS):
+        with upstream_scheduler.slot(lane):
+            circuit_breaker.before_call()
+            started_at = time.monotonic()
+            try:
+                result = call()
+            except Exception as e:
+                _record_outcome(e, started_at)
+                error = e
+            else:
+                _record_outcome(None, started_at)
+                return result
+        # Back off outside the concurrency slot so waiting retries do not block others
+        if attempt + 1 < RETRY_ATTEMPTS and is_transient_error(error):
+            time.sleep(retry_delay(attempt, error))
+            continue
+        raise error
+
+def stream_with_resilience(open_stream, lane="interactive"):
+    """Yield from an upstream stream with the same protection as call_with_resilience.
+
+    Retries only happen before the first chunk; a stream that breaks midway is
+    reported to the caller.
+    """
+    for attempt in range(RETRY_ATTEMPTS):
+        received = False
+        error = None
+        with upstream_scheduler.slot(lane):
+            circuit_breaker.before_call()
+            started_at = time.monotonic()
+            try:
+                for chunk in open_stream():
+                    if not received:
+                        # Time to first chunk is what sessions feel
+                        concurrency_limiter.record_latency(time.monotonic() - started_at)
+                        received = True
+                    yield chunk
+            except GeneratorExit:
+                # The page stopped reading; that says nothing about the service
+                circuit_breaker.release_trial()
+                raise
+            except Exception as e:
+                _record_outcome(e, started_at)
+                error = e
+            else:
+                circuit_breaker.record_success()
+                return
+        if not received and attempt + 1 < RETRY_ATTEMPTS and is_transient_error(error):
+            time.sleep(retry_delay(attempt, error))
+            continue
+        raise error
+
+def get_resilience_stats():
+    """Return the state of the circuit breaker, concurrency limit and scheduler queues"""
+    return {
+        "circuit_state": circuit_breaker.state,
+        "concurrency_limit": int(concurrency_limiter.limit),
+        "in_flight": upstream_scheduler.in_flight,
+        "scheduler": upstream_scheduler.stats()
+    }
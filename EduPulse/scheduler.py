@@ -0,0 +1,252 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from metrics import registry
+
+# Interactive requests (answers, support) are granted ahead of bulk ones (exams,
+# summaries). After this many interactive grants in a row a waiting bulk request
+# gets its turn, so bulk work slows down under load instead of stopping.
+INTERACTIVE_BURST = int(os.getenv('EDUPULSE_INTERACTIVE_BURST', '4'))
+
+# Share of the upstream concurrency limit that bulk requests may hold at once.
+# The rest is kept free for interactive requests so they never wait behind long generations.
+BULK_SHARE = float(os.getenv('EDUPULSE_BULK_SHARE', '0.75'))
+
+# Admission control: requests beyond these queue lengths are turned away immediately
+MAX_WAITING = {
+    "interactive": int(os.getenv('EDUPULSE_MAX_WAITING_INTERACTIVE', '200')),
+    "bulk": int(os.getenv('EDUPULSE_MAX_WAITING_BULK', '100'))
+}
+MAX_WAITING_PER_SESSION = int(os.getenv('EDUPULSE_MAX_WAITING_PER_SESSION', '16'))
+
+# How often a waiting request re-checks the limit and reports its queue position
+POLL_SECONDS = 0.5
+
+LANES = ("interactive", "bulk")
+
+class AdmissionError(RuntimeError):
+    """Raised when a request is turned away because the queue is full"""
+
+# Session a request belongs to, pinned when work moves to another thread
+_current_session = contextvars.ContextVar('edupulse_session', default=None)
+
+# Called with the queue position while a request waits, then with None once it runs
+_queue_listener = contextvars.ContextVar('edupulse_queue_listener', default=None)
+
+def current_session_id():
+    """ID of the browser session the current request belongs to"""
+    session_id = _current_session.get()
+    if session_id is None:
+        ctx = get_script_run_ctx(suppress_warning=True)
+        session_id = ctx.session_id if ctx is not None else "background"
+    return session_id
+
+def session_context():
+    """Copy of the current context with the session pinned, for running work on another thread"""
+    context = contextvars.copy_context()
+    context.run(_current_session.set, current_session_id())
+    return context
+
+@contextmanager
+def listen_queue(callback):
+    """Report the queue position of model requests made inside the block to callback"""
+    token = _queue_listener.set(callback)
+    try:
+        yield
+    finally:
+        _queue_listener.reset(token)
+
+def queue_listener():
+    """The callback set by listen_queue for the current context, if any"""
+    return _queue_listener.get()
+
+class _Ticket:
+    __slots__ = ("lane", "session", "granted", "enqueued_at")
+
+    def __init__(self, lane, session):
+        self.lane = lane
+        self.session = session
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+class FairScheduler:
+    """Grants upstream call slots fairly across sessions, with an interactive and a bulk lane.
+
+    Waiting requests are queued per session and sessions take turns (round robin),
+    so one student's 50-question exam cannot starve everyone else's short answers.
+    The number of slots follows the adaptive concurrency limit. With a rate limiter,
+    a slot is only granted together with a token from it.
+    """
+
+    def __init__(self, capacity, interactive_burst=INTERACTIVE_BURST, bulk_share=BULK_SHARE,
+                 max_waiting=MAX_WAITING, max_waiting_per_session=MAX_WAITING_PER_SESSION, rate_limiter=None):
+        self.capacity = capacity
+        self.rate_limiter = rate_limiter
+        self.interactive_burst = interactive_burst
+        self.bulk_share = bulk_share
+        self.max_waiting = max_waiting
+        self.max_waiting_per_session = max_waiting_per_session
+        self._condition = threading.Condition()
+        self._queues = {lane: OrderedDict() for lane in LANES}
+        self._waiting = {lane: 0 for lane in LANES}
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._interactive_streak = 0
+        self._next_token_at = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @property
+    def in_flight(self):
+        return sum(self._in_flight.values())
+
+    @contextmanager
+    def slot(self, lane="interactive", timeout=60):
+        """Hold one upstream slot for the duration of a call, waiting for a fair turn"""
+        ticket = self._enqueue(lane, current_session_id())
+        try:
+            self._wait(ticket, timeout)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def _enqueue(self, lane, session):
+        ticket = _Ticket(lane, session)
+        with self._condition:
+            queue = self._queues[lane].get(session)
+            if self._waiting[lane] >= self.max_waiting[lane] or (
+                    queue is not None and len(queue) >= self.max_waiting_per_session):
+                self._rejected += 1
+                registry.increment("edupulse_llm_rejected_total", {"lane": lane})
+                raise AdmissionError("The AI service is very busy right now, please try again in a moment")
+            if queue is None:
+                queue = self._queues[lane][session] = deque()
+            queue.append(ticket)
+            self._waiting[lane] += 1
+            self._grant_ready()
+        return ticket
+
+    def _wait(self, ticket, timeout):
+        deadline = time.monotonic() + timeout
+        listener = _queue_listener.get()
+        reported = None
+        while True:
+            with self._condition:
+                # The limit may have grown since the last grant
+                self._grant_ready()
+                if not ticket.granted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timed_out += 1
+                        raise AdmissionError("The AI service is busy, please try again in a moment")
+                    position = self._position(ticket)
+                    if listener is None or position == reported:
+                        wait = min(remaining, POLL_SECONDS)
+                        # Wake up when the rate limiter has a token again
+                        until_token = self._next_token_at - time.monotonic()
+                        if until_token > 0:
+                            wait = min(wait, until_token)
+                        self._condition.wait(wait)
+                        continue
+            if ticket.granted:
+                break
+            # Report outside the lock; the listener may update the page
+            listener(position)
+            reported = position
+        registry.observe("edupulse_llm_queue_seconds", {"lane": ticket.lane}, time.monotonic() - ticket.enqueued_at)
+        if reported is not None:
+            listener(None)
+
+    def _abandon(self, ticket):
+        with self._condition:
+            if ticket.granted:
+                self._in_flight[ticket.lane] -= 1
+            else:
+                self._remove(ticket)
+            self._grant_ready()
+
+    def _release(self, ticket):
+        with self._condition:
+            self._in_flight[ticket.lane] -= 1
+            self._grant_ready()
+
+    def _remove(self, ticket):
+        sessions = self._queues[ticket.lane]
+        queue = sessions.get(ticket.session)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            self._waiting[ticket.lane] -= 1
+            if not queue:
+                del sessions[ticket.session]
+
+    def _grant_ready(self):
+        """Hand free slots to waiting requests; called with the lock held"""
+        granted = False
+        while True:
+            lane = self._next_lane()
+            if lane is None:
+                break
+            if self.rate_limiter is not None:
+                until_token = self.rate_limiter.try_acquire()
+                if until_token:
+                    # Over the request rate; the same request is next once a token is back
+                    self._next_token_at = time.monotonic() + until_token
+                    break
+            # Round robin: take the oldest request of the session whose turn it is
+            sessions = self._queues[lane]
+            session, queue = next(iter(sessions.items()))
+            ticket = queue.popleft()
+            self._waiting[lane] -= 1
+            if queue:
+                sessions.move_to_end(session)
+            else:
+                del sessions[session]
+            ticket.granted = True
+            self._in_flight[lane] += 1
+            self._interactive_streak = self._interactive_streak + 1 if lane == "interactive" else 0
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def _next_lane(self):
+        limit = max(1, int(self.capacity()))
+        if self.in_flight >= limit:
+            return None
+        bulk_ready = bool(self._queues["bulk"]) and self._in_flight["bulk"] < max(1, int(limit * self.bulk_share))
+        if self._queues["interactive"] and (not bulk_ready or self._interactive_streak < self.interactive_burst):
+            return "interactive"
+        return "bulk" if bulk_ready else None
+
+    def _position(self, ticket):
+        """Number of waiting requests that will be granted before this one"""
+        sessions = self._queues[ticket.lane]
+        rank = sessions[ticket.session].index(ticket)
+        ahead = rank
+        before = True
+        for session, queue in sessions.items():
+            if session == ticket.session:
+                before = False
+                continue
+            ahead += min(len(queue), rank + 1 if before else rank)
+        if ticket.lane == "bulk":
+            ahead += self._waiting["interactive"]
+        return ahead
+
+    def stats(self):
+        with self._condition:
+            return {
+                "in_flight": dict(self._in_flight),
+                "waiting": dict(self._waiting),
+                "waiting_sessions": {lane: len(self._queues[lane]) for lane in LANES},
+                "rejected": self._rejected,
+                "timed_out": self._timed_out
+            }
@@ -0,0 +1,22 @@
+import os
+import sqlite3
+
+# Directory for the on-disk caches. Shared by every session of the server process.
+CACHE_DIR = os.getenv(
+    'EDUPULSE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+def open_database(name):
+    """Open a SQLite database in the cache directory that can be shared across threads"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(
+        os.path.join(CACHE_DIR, name),
+        timeout=30,
+        check_same_thread=False,
+        isolation_level=None
+    )
+    # WAL lets readers keep going while another session writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
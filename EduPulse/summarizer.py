@@ -0,0 +1,149 @@
+import os
+import re
+
+from transcripts import format_timestamp, timestamp_url
+from utils import MAX_CONCURRENCY, estimate_tokens, generate_stream, run_watson_granite_batch
+
+# Token budget for one chunk of a long document
+CHUNK_TOKENS = int(os.getenv('EDUPULSE_CHUNK_TOKENS', '3000'))
+
+# Upper bound on merge rounds when the partial summaries are still too long
+MAX_COLLAPSE_ROUNDS = 4
+
+# Shown in place of a chapter that still failed after a retry
+CHAPTER_FAILED_NOTE = "_This chapter could not be summarized right now. Generate the summary again to retry it._"
+
+def _split_sentences(text):
+    return [sentence for sentence in re.split(r'(?<=[.!?])\s+', text) if sentence.strip()]
+
+def _split_words(text, max_tokens):
+    """Hard split on word boundaries for a sentence that is longer than the budget"""
+    pieces, current = [], []
+    for word in text.split():
+        if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """Split text into chunks within a token budget, on paragraph then sentence boundaries"""
+    units = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in _split_sentences(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+            else:
+                units.extend(_split_words(sentence, max_tokens))
+
+    chunks, current, current_tokens = [], [], 0
+    for unit in units:
+        unit_tokens = estimate_tokens(unit) + 1
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def needs_chunking(text, max_tokens=CHUNK_TOKENS):
+    """Check whether a document is too long to summarize in a single call"""
+    return estimate_tokens(text) > max_tokens
+
+def _first_error(responses):
+    return next((response for response in responses if response.startswith("Error")), None)
+
+def map_summaries(text, map_system_prompt, max_tokens=CHUNK_TOKENS, max_concurrency=MAX_CONCURRENCY,
+                  profile="section_summary"):
+    """Summarize every chunk of a long text in parallel.
+
+    Partial summaries are merged in further parallel rounds until they fit in a
+    single prompt. Returns the combined partial summaries ready for the final
+    reduce step, or an "Error: ..." string if any chunk failed.
+    """
+    chunks = split_into_chunks(text, max_tokens)
+    prompts = [
+        (f"Section {index} of {len(chunks)}:\n\n{chunk}", map_system_prompt)
+        for index, chunk in enumerate(chunks, start=1)
+    ]
+    partials = run_watson_granite_batch(prompts, max_concurrency=max_concurrency, profile=profile)
+    error = _first_error(partials)
+    if error:
+        return error
+
+    combined = "\n\n".join(partials)
+    rounds = 0
+    while needs_chunking(combined, max_tokens) and rounds < MAX_COLLAPSE_ROUNDS:
+        groups = split_into_chunks(combined, max_tokens)
+        if len(groups) <= 1:
+            break
+        partials = run_watson_granite_batch(
+            [(group, map_system_prompt) for group in groups],
+            max_concurrency=max_concurrency,
+            profile=profile
+        )
+        error = _first_error(partials)
+        if error:
+            return error
+        combined = "\n\n".join(partials)
+        rounds += 1
+    return combined
+
+def summarize_long_text(text, map_system_prompt, reduce_system_prompt, profile="summary"):
+    """Summarize the sections of a long text, then stream the merged summary.
+
+    Meant to run as a background job: yields the final summary in chunks, or a
+    single "Error: ..." string if a section failed.
+    """
+    partial_summaries = map_summaries(text, map_system_prompt)
+    if partial_summaries.startswith("Error"):
+        yield partial_summaries
+        return
+    yield from generate_stream(partial_summaries, reduce_system_prompt, profile=profile)
+
+def summarize_chapters(video_id, chapters, chapter_system_prompt, max_concurrency=MAX_CONCURRENCY,
+                       profile="chapter_summary"):
+    """Summarize lecture chapters in parallel and assemble them with timestamp links.
+
+    Failed chapters are retried once. Chapters that still fail are kept as a note,
+    so one bad chapter does not cost the rest of the summary; an "Error: ..."
+    string is returned only if every chapter failed.
+    """
+    prompts = [
+        (f"Chapter {index} of {len(chapters)} "
+         f"({format_timestamp(chapter['start'])} - {format_timestamp(chapter['end'])}):\n\n{chapter['text']}",
+         chapter_system_prompt)
+        for index, chapter in enumerate(chapters, start=1)
+    ]
+    summaries = run_watson_granite_batch(prompts, max_concurrency=max_concurrency, profile=profile)
+    failed = [i for i, summary in enumerate(summaries) if summary.startswith("Error")]
+    if failed:
+        retried = run_watson_granite_batch([prompts[i] for i in failed], max_concurrency=max_concurrency,
+                                           profile=profile)
+        for i, summary in zip(failed, retried):
+            summaries[i] = summary
+    if all(summary.startswith("Error") for summary in summaries):
+        return _first_error(summaries)
+
+    sections = []
+    for index, (chapter, summary) in enumerate(zip(chapters, summaries), start=1):
+        start, end = format_timestamp(chapter['start']), format_timestamp(chapter['end'])
+        body = CHAPTER_FAILED_NOTE if summary.startswith("Error") else summary.strip()
+        sections.append(
+            f"#### Chapter {index} · [{start}]({timestamp_url(video_id, chapter['start'])}) - {end}\n\n{body}"
+        )
+    return "\n\n".join(sections)
+
+def chapters_complete(markdown):
+    """Check that no chapter of a summary from summarize_chapters is missing"""
+    return CHAPTER_FAILED_NOTE not in markdown
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# The app modules live one level up and read their settings at import time
+os.environ["EDUPULSE_LLM_BACKEND"] = "mock"
+os.environ.setdefault("EDUPULSE_MOCK_LATENCY", "0")
+os.environ.setdefault("EDUPULSE_MOCK_TOKENS_PER_SECOND", "0")
+# Never the server's caches: tests write to the stores
+os.environ["EDUPULSE_CACHE_DIR"] = tempfile.mkdtemp(prefix="edupulse-tests-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
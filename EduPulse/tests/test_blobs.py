@@ -0,0 +1,56 @@
+import uuid
+
+import blobs
+from blobs import BlobStore, content_hash, derive
+
+def make_store(**kwargs):
+    return BlobStore(db_name=f"blobs-{uuid.uuid4().hex}.sqlite3", **kwargs)
+
+def test_identical_texts_are_stored_once():
+    store = make_store()
+    first = store.put("The syllabus for biology 101.")
+    second = store.put("The syllabus for biology 101.")
+    assert first == second == content_hash("The syllabus for biology 101.")
+    assert store.get(first) == "The syllabus for biology 101."
+    assert store.stats()["stored"] == 1
+    assert store.stats()["deduplicated"] == 1
+
+def test_derived_results_are_keyed_by_kind_and_options():
+    store = make_store(derived_enabled=True)
+    blob = store.put("def f(x):\n    return x * 2\n")
+    store.set_derived(blob, "code_review", {"language": "Python", "task": "Code Review"}, "Looks fine.")
+    assert store.get_derived(blob, "code_review", {"task": "Code Review", "language": "Python"}) == "Looks fine."
+    assert store.get_derived(blob, "code_review", {"language": "Java", "task": "Code Review"}) is None
+    assert store.get_derived(blob, "code_format", {"language": "Python"}) is None
+
+def test_errors_are_not_cached():
+    store = make_store(derived_enabled=True)
+    blob = store.put("A lecture transcript.")
+    store.set_derived(blob, "lecture_summary", {}, "Error: upstream failed")
+    assert store.get_derived(blob, "lecture_summary", {}) is None
+
+def test_memory_stays_within_its_byte_budget():
+    store = make_store(max_memory_bytes=64 * 1024)
+    hashes = [store.put(f"Document {index}. " + "word " * 2000) for index in range(20)]
+    assert store.stats()["memory_bytes"] <= 64 * 1024
+    # Texts pushed out of memory are read back from disk
+    assert all(store.get(blob).startswith(f"Document {index}.") for index, blob in enumerate(hashes))
+    assert store.stats()["memory_bytes"] <= 64 * 1024
+
+def test_large_texts_are_only_kept_on_disk():
+    store = make_store(max_memory_bytes=64 * 1024)
+    book = "chapter " * 100000
+    blob = store.put(book)
+    assert store.stats()["memory_entries"] == 0
+    assert store.get(blob) == book
+
+def test_derive_skips_results_rejected_by_cache_if(monkeypatch):
+    store = make_store(derived_enabled=True)
+    monkeypatch.setattr(blobs, "blob_store", store)
+    blob = store.put("A lecture transcript.")
+    partial = "".join(derive(blob, "lecture_summary", {}, lambda: "Chapter 2 missing.",
+                             cache_if=lambda result: "missing" not in result))
+    assert partial == "Chapter 2 missing."
+    assert store.get_derived(blob, "lecture_summary", {}) is None
+    "".join(derive(blob, "lecture_summary", {}, lambda: "Complete.", cache_if=lambda result: "missing" not in result))
+    assert store.get_derived(blob, "lecture_summary", {}) == "Complete."
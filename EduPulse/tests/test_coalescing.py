@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils
+
+PROMPT = "Explain photosynthesis"
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replace the WatsonX stream with one the test releases chunk by chunk"""
+    state = {"calls": 0, "release": threading.Event(), "error": None}
+
+    def fake_stream(complete_prompt, params, profile):
+        state["calls"] += 1
+        yield "Light "
+        state["release"].wait(5)
+        if state["error"]:
+            raise state["error"]
+        yield "becomes sugar."
+
+    monkeypatch.setattr(utils, "CACHE_ENABLED", False)
+    monkeypatch.setattr(utils, "_stream_text", fake_stream)
+    monkeypatch.setattr(utils, "_generate_text", lambda prompt, params, profile: "".join(fake_stream(prompt, params, profile)))
+    return state
+
+def start_followers(count):
+    # The counter is shared by every test, so count from where it stands now
+    before = utils.get_coalescing_stats()["coalesced"]
+    executor = ThreadPoolExecutor(max_workers=count)
+    futures = [executor.submit(utils.run_watson_granite, PROMPT) for _ in range(count)]
+    # Wait until every follower has joined the leader's flight
+    for _ in range(500):
+        if utils.get_coalescing_stats()["coalesced"] >= before + count:
+            break
+        threading.Event().wait(0.01)
+    else:
+        pytest.fail("followers did not join the flight")
+    return executor, futures
+
+def test_followers_share_one_upstream_call(upstream):
+    before = utils.get_coalescing_stats()["coalesced"]
+    leader = utils.generate_stream(PROMPT)
+    assert next(leader) == "Light "
+    executor, futures = start_followers(3)
+    upstream["release"].set()
+    assert "".join(leader) == "becomes sugar."
+    assert [future.result(5) for future in futures] == ["Light becomes sugar."] * 3
+    assert upstream["calls"] == 1
+    assert utils.get_coalescing_stats()["coalesced"] - before == 3
+    executor.shutdown()
+
+def test_abandoned_leader_does_not_fail_followers(upstream):
+    leader = utils.generate_stream(PROMPT)
+    assert next(leader) == "Light "
+    executor, futures = start_followers(3)
+    # The student who started the generation leaves the page
+    leader.close()
+    upstream["release"].set()
+    assert [future.result(5) for future in futures] == ["Light becomes sugar."] * 3
+    assert upstream["calls"] == 1
+    executor.shutdown()
+
+def test_leader_error_reaches_followers(upstream):
+    upstream["error"] = RuntimeError("upstream failed")
+    leader = utils.generate_stream(PROMPT)
+    assert next(leader) == "Light "
+    executor, futures = start_followers(2)
+    upstream["release"].set()
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        list(leader)
+    assert [future.result(5) for future in futures] == ["Error: upstream failed"] * 2
+    # A failed flight is not reused by the next request
+    assert utils.get_coalescing_stats()["in_flight"] == 0
+    executor.shutdown()
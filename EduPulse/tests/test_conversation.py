@@ -0,0 +1,22 @@
+from conversation import ConversationContext, is_follow_up
+from utils import estimate_tokens
+
+def test_questions_referring_back_are_follow_ups():
+    assert is_follow_up("Can you give an example of that?")
+    assert is_follow_up("Why does it happen at night?")
+    assert is_follow_up("What about mitochondria?")
+    assert is_follow_up("Explain further")
+    assert is_follow_up("Why exactly?")
+
+def test_standalone_questions_are_not_follow_ups():
+    assert not is_follow_up("How does photosynthesis work in plants?")
+    assert not is_follow_up("What were the main causes of World War I?")
+    assert not is_follow_up("Solve x + 2 = 5 for x")
+    assert not is_follow_up("What is DNA?")
+
+def test_context_stays_within_its_budget():
+    context = ConversationContext(token_budget=200)
+    for turn in range(30):
+        context.add_turn(f"Question {turn} about cells?", "Cells are the basic unit of life. " * 40)
+    assert estimate_tokens(context.render()) <= 200
+    assert "Question 29" in context.render()
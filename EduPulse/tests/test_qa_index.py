@@ -0,0 +1,30 @@
+from qa_index import QuestionIndex
+
+def test_reuses_answer_to_near_identical_question():
+    index = QuestionIndex()
+    index.add("How does photosynthesis work?", "Light becomes sugar.")
+    match = index.lookup("how does photosynthesis work")
+    assert match["answer"] == "Light becomes sugar."
+
+def test_numbered_events_do_not_match_each_other():
+    index = QuestionIndex()
+    index.add("What were the main causes of World War I?", "WWI answer")
+    assert index.lookup("What were the main causes of World War II?") is None
+    assert index.lookup("what were the main causes of world war ii?") is None
+    assert index.lookup("What were the main causes of World War I?")["answer"] == "WWI answer"
+
+def test_numbers_must_match_exactly():
+    index = QuestionIndex()
+    index.add("Solve x + 2 = 5", "x = 3")
+    assert index.lookup("Solve x + 2 = 7") is None
+
+def test_best_match_with_the_same_numerals_wins():
+    index = QuestionIndex()
+    index.add("What were the main causes of World War II?", "WWII answer")
+    index.add("What were the main causes of World War I?", "WWI answer")
+    assert index.lookup("What were the main causes of World War II?")["answer"] == "WWII answer"
+
+def test_pronoun_is_not_a_numeral():
+    index = QuestionIndex()
+    index.add("How can I improve my essay writing?", "Outline first.")
+    assert index.lookup("How can I improve my essay writing")["answer"] == "Outline first."
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, ServiceUnavailableError
+
+def open_breaker(reset_timeout=0.05):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=reset_timeout)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+def test_breaker_opens_after_repeated_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+def test_half_open_lets_one_trial_through_and_closes_on_success():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_failed_trial_opens_the_breaker_again():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+
+def test_released_trial_lets_the_next_call_try():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.release_trial()
+    breaker.before_call()
+    assert breaker.state == "half_open"
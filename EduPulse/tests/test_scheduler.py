@@ -0,0 +1,187 @@
+import threading
+import time
+
+import pytest
+
+import scheduler
+from resilience import TokenBucket
+from scheduler import AdmissionError, FairScheduler, listen_queue
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+class Request:
+    """One request of a session holding its slot until the test releases it"""
+
+    def __init__(self, fair, name, session, lane="interactive", order=None, timeout=5):
+        self.name = name
+        self.release = threading.Event()
+        self.error = None
+        self.done = threading.Event()
+        order = order if order is not None else []
+        waiting = sum(fair.stats()["waiting"].values()) + fair.in_flight
+
+        def run():
+            scheduler._current_session.set(session)
+            try:
+                with fair.slot(lane, timeout=timeout):
+                    order.append(name)
+                    self.release.wait(5)
+            except AdmissionError as e:
+                self.error = e
+            finally:
+                self.done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        # Requests are queued in the order they are created
+        wait_until(lambda: self.done.is_set() or sum(fair.stats()["waiting"].values()) + fair.in_flight > waiting)
+
+def grant_order(requests, order, count):
+    """Release each granted request in turn and return the order of the grants"""
+    by_name = {request.name: request for request in requests}
+    for step in range(count):
+        wait_until(lambda: len(order) > step)
+        by_name[order[step]].release.set()
+    return order
+
+def test_sessions_take_turns():
+    fair = FairScheduler(lambda: 1)
+    order = []
+    requests = [Request(fair, "hog", "H", order=order)]
+    requests += [Request(fair, f"A{i}", "A", order=order) for i in range(1, 4)]
+    requests += [Request(fair, "B1", "B", order=order), Request(fair, "C1", "C", order=order)]
+    assert grant_order(requests, order, 6) == ["hog", "A1", "B1", "C1", "A2", "A3"]
+
+def test_interactive_goes_first_but_bulk_gets_a_turn_after_a_burst():
+    fair = FairScheduler(lambda: 1, interactive_burst=3)
+    order = []
+    requests = [Request(fair, "hog", "H", order=order), Request(fair, "bulk", "B", lane="bulk", order=order)]
+    requests += [Request(fair, f"I{i}", f"S{i}", order=order) for i in range(1, 5)]
+    assert grant_order(requests, order, 6) == ["hog", "I1", "I2", "bulk", "I3", "I4"]
+
+def test_bulk_keeps_to_its_share_of_the_slots():
+    fair = FairScheduler(lambda: 4, bulk_share=0.5)
+    bulk = [Request(fair, f"bulk{i}", f"S{i}", lane="bulk") for i in range(4)]
+    assert fair.stats()["in_flight"] == {"interactive": 0, "bulk": 2}
+    assert fair.stats()["waiting"]["bulk"] == 2
+    interactive = Request(fair, "answer", "Q")
+    assert fair.stats()["in_flight"] == {"interactive": 1, "bulk": 2}
+    for request in bulk + [interactive]:
+        request.release.set()
+    wait_until(lambda: all(request.done.is_set() for request in bulk))
+    assert fair.in_flight == 0
+
+def test_full_queues_turn_requests_away():
+    fair = FairScheduler(lambda: 1, max_waiting={"interactive": 2, "bulk": 2}, max_waiting_per_session=1)
+    hog = Request(fair, "hog", "H")
+    first = Request(fair, "A1", "A")
+    same_session = Request(fair, "A2", "A")
+    assert isinstance(same_session.error, AdmissionError)
+    second = Request(fair, "B1", "B")
+    full = Request(fair, "C1", "C")
+    assert isinstance(full.error, AdmissionError)
+    assert fair.stats()["rejected"] == 2
+    for request in (hog, first, second):
+        request.release.set()
+    wait_until(lambda: first.done.is_set() and second.done.is_set())
+    assert first.error is None and second.error is None
+
+def test_timed_out_request_leaves_the_queue():
+    fair = FairScheduler(lambda: 1)
+    hog = Request(fair, "hog", "H")
+    late = Request(fair, "late", "A", timeout=0.1)
+    wait_until(late.done.is_set)
+    assert isinstance(late.error, AdmissionError)
+    assert fair.stats()["waiting"]["interactive"] == 0
+    assert fair.stats()["timed_out"] == 1
+    hog.release.set()
+    wait_until(lambda: fair.in_flight == 0)
+    # The abandoned request did not keep a slot
+    with fair.slot("interactive", timeout=0.1):
+        assert fair.in_flight == 1
+
+class PageRerun(BaseException):
+    """Like Streamlit's rerun and stop exceptions, which are not Exceptions"""
+
+def test_request_abandoned_while_waiting_frees_its_place():
+    fair = FairScheduler(lambda: 1)
+    hog = Request(fair, "hog", "H")
+
+    def leave_page(position):
+        # The page reran while the request was waiting
+        raise PageRerun
+
+    with pytest.raises(PageRerun):
+        with listen_queue(leave_page):
+            with fair.slot("interactive", timeout=5):
+                pass
+    assert fair.stats()["waiting"]["interactive"] == 0
+    hog.release.set()
+    wait_until(lambda: fair.in_flight == 0)
+
+def test_waiting_request_reports_its_position():
+    fair = FairScheduler(lambda: 1)
+    hog = Request(fair, "hog", "H")
+    ahead = Request(fair, "A1", "A")
+    positions = []
+    done = threading.Event()
+
+    def run():
+        scheduler._current_session.set("B")
+        with listen_queue(positions.append):
+            with fair.slot("interactive", timeout=5):
+                pass
+        done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    wait_until(lambda: positions)
+    assert positions[0] == 1
+    hog.release.set()
+    ahead.release.set()
+    wait_until(done.is_set)
+    assert positions[-1] is None
+
+def test_rate_limited_requests_wait_their_turn_in_the_queue():
+    # Plenty of slots, one token every 0.1 s: the rate limit is what binds
+    fair = FairScheduler(lambda: 100, rate_limiter=TokenBucket(rate_per_second=10, capacity=1))
+    order = []
+    requests = [Request(fair, f"bulk{i}", f"S{i}", lane="bulk", order=order) for i in range(3)]
+    requests.append(Request(fair, "answer", "Q", order=order))
+    assert fair.stats()["waiting"] == {"interactive": 1, "bulk": 2}
+    for request in requests:
+        request.release.set()
+    wait_until(lambda: all(request.done.is_set() for request in requests))
+    assert order == ["bulk0", "answer", "bulk1", "bulk2"]
+
+def test_rate_limit_serves_every_waiting_session():
+    # Ten students summarizing lectures at once, four chapters in flight each
+    fair = FairScheduler(lambda: 100, rate_limiter=TokenBucket(rate_per_second=200, capacity=1))
+    served = {f"S{i}": 0 for i in range(10)}
+    errors = []
+
+    def student(session):
+        def chapter():
+            scheduler._current_session.set(session)
+            try:
+                for _ in range(9):
+                    with fair.slot("bulk", timeout=5):
+                        served[session] += 1
+            except AdmissionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=chapter) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    students = [threading.Thread(target=student, args=(session,)) for session in served]
+    for thread in students:
+        thread.start()
+    for thread in students:
+        thread.join()
+    assert errors == []
+    assert set(served.values()) == {36}
@@ -0,0 +1,50 @@
+import summarizer
+from utils import MAX_CONCURRENCY
+
+def make_chapters(count, minutes=5):
+    return [{"start": i * minutes * 60, "end": (i + 1) * minutes * 60, "text": f"Part {i}."} for i in range(count)]
+
+def test_chapters_share_the_batch_concurrency(monkeypatch):
+    calls = []
+
+    def fake_batch(prompts, max_concurrency, profile):
+        calls.append(max_concurrency)
+        return ["Summary." for _ in prompts]
+
+    monkeypatch.setattr(summarizer, "run_watson_granite_batch", fake_batch)
+    summarizer.summarize_chapters("abcdefghijk", make_chapters(3), "Summarize.")
+    # A 3-hour lecture in 5-minute chapters
+    summarizer.summarize_chapters("abcdefghijk", make_chapters(36), "Summarize.")
+    assert calls == [MAX_CONCURRENCY, MAX_CONCURRENCY]
+
+def test_chapter_headings_link_into_the_video(monkeypatch):
+    monkeypatch.setattr(summarizer, "run_watson_granite_batch", lambda prompts, **kwargs: ["Summary."] * len(prompts))
+    markdown = summarizer.summarize_chapters("abcdefghijk", make_chapters(2), "Summarize.")
+    assert markdown.startswith("#### Chapter 1 · [0:00](https://www.youtube.com/watch?v=abcdefghijk&t=0s) - 5:00")
+    assert "#### Chapter 2 · [5:00](https://www.youtube.com/watch?v=abcdefghijk&t=300s)" in markdown
+
+def test_failed_chapter_is_retried(monkeypatch):
+    batches = [["Summary one.", "Error: upstream failed", "Summary three."], ["Summary two."]]
+    calls = []
+
+    def fake_batch(prompts, **kwargs):
+        calls.append(len(prompts))
+        return batches.pop(0)
+
+    monkeypatch.setattr(summarizer, "run_watson_granite_batch", fake_batch)
+    markdown = summarizer.summarize_chapters("abcdefghijk", make_chapters(3), "Summarize.")
+    assert calls == [3, 1]
+    assert "Summary two." in markdown and summarizer.chapters_complete(markdown)
+
+def test_chapter_failing_twice_keeps_the_others(monkeypatch):
+    monkeypatch.setattr(summarizer, "run_watson_granite_batch",
+                        lambda prompts, **kwargs: ["Summary."] * (len(prompts) - 1) + ["Error: upstream failed"])
+    markdown = summarizer.summarize_chapters("abcdefghijk", make_chapters(2), "Summarize.")
+    assert markdown.startswith("#### Chapter 1")
+    assert "#### Chapter 2" in markdown and summarizer.CHAPTER_FAILED_NOTE in markdown
+    assert not summarizer.chapters_complete(markdown)
+
+def test_summary_fails_when_every_chapter_fails(monkeypatch):
+    monkeypatch.setattr(summarizer, "run_watson_granite_batch",
+                        lambda prompts, **kwargs: ["Error: upstream failed"] * len(prompts))
+    assert summarizer.summarize_chapters("abcdefghijk", make_chapters(2), "Summarize.").startswith("Error")
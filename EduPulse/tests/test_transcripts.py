@@ -0,0 +1,64 @@
+import sys
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import transcripts
+
+@pytest.fixture
+def youtube(monkeypatch):
+    """A YouTube client whose fetches block until the test releases them"""
+    state = {"fetches": 0, "release": threading.Event(), "error": None}
+
+    def get_transcript(video_id):
+        state["fetches"] += 1
+        state["release"].wait(5)
+        if state["error"]:
+            raise state["error"]
+        return [{"text": f"Lecture {video_id}", "start": 0.0, "duration": 5.0}]
+
+    client = types.SimpleNamespace(YouTubeTranscriptApi=types.SimpleNamespace(get_transcript=get_transcript))
+    monkeypatch.setitem(sys.modules, "youtube_transcript_api", client)
+    monkeypatch.setattr(transcripts, "_memory", transcripts.OrderedDict())
+    return state
+
+def wait_for_fetch(video_id):
+    for _ in range(500):
+        if video_id in transcripts._fetches:
+            return
+        threading.Event().wait(0.01)
+
+def test_concurrent_sessions_share_one_fetch(youtube):
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [executor.submit(transcripts.get_transcript, "shared00001") for _ in range(10)]
+        wait_for_fetch("shared00001")
+        threading.Event().wait(0.1)
+        youtube["release"].set()
+        results = [future.result(5) for future in futures]
+    assert youtube["fetches"] == 1
+    assert all(result == results[0] for result in results)
+    assert transcripts._fetches == {}
+
+def test_failed_fetch_reaches_every_waiter_and_is_retried(youtube):
+    youtube["error"] = RuntimeError("no transcript")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(transcripts.get_transcript, "failing0001") for _ in range(3)]
+        wait_for_fetch("failing0001")
+        youtube["release"].set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="no transcript"):
+                future.result(5)
+    youtube["error"] = None
+    assert transcripts.get_transcript("failing0001")[0]["text"] == "Lecture failing0001"
+
+def test_disk_store_is_pruned(youtube, monkeypatch):
+    youtube["release"].set()
+    monkeypatch.setattr(transcripts, "MAX_DISK_TRANSCRIPTS", 5)
+    # The fifth write reaches the prune interval
+    monkeypatch.setattr(transcripts, "_writes_since_prune", 95)
+    for index in range(5):
+        transcripts.get_transcript(f"pruned{index:05d}")
+    count = transcripts._database().execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+    assert count == 5
@@ -0,0 +1,30 @@
+import time
+import uuid
+
+from translation_memory import TranslationMemory
+
+def make_memory(**kwargs):
+    return TranslationMemory(db_name=f"tm-{uuid.uuid4().hex}.sqlite3", **kwargs)
+
+def disk_segments(memory):
+    return memory._database().execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+def test_disk_store_is_pruned_to_its_limit():
+    memory = make_memory(max_disk_segments=5)
+    # The fifth write reaches the prune interval
+    memory._writes_since_prune = 95
+    for index in range(5):
+        memory.store("English", "French", {f"Sentence {index}a.": "a", f"Sentence {index}b.": "b"})
+    assert disk_segments(memory) == 5
+
+def test_expired_segments_are_not_served_and_get_pruned():
+    memory = make_memory(ttl_seconds=60)
+    memory.store("English", "French", {"Hello.": "Bonjour."})
+    memory._database().execute("UPDATE segments SET created_at = ?", (time.time() - 120,))
+    # A new memory on the same file has nothing in its in-memory front
+    reopened = TranslationMemory(db_name=memory.db_name, ttl_seconds=60)
+    assert reopened.lookup("English", "French", ["Hello."]) == {}
+    reopened._writes_since_prune = 99
+    reopened.store("English", "French", {"Goodbye.": "Au revoir."})
+    assert disk_segments(reopened) == 1
+    assert reopened.lookup("English", "French", ["Goodbye."]) == {"Goodbye.": "Au revoir."}
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+from storage import open_database
+
+# Number of parsed transcripts kept in memory for the whole server
+MAX_MEMORY_TRANSCRIPTS = 64
+
+# Transcripts kept on disk and how long before a video's transcript is fetched again
+MAX_DISK_TRANSCRIPTS = int(os.getenv('EDUPULSE_TRANSCRIPT_DISK_ENTRIES', '2000'))
+TRANSCRIPT_TTL_SECONDS = float(os.getenv('EDUPULSE_TRANSCRIPT_TTL_DAYS', '30')) * 24 * 3600
+
+_VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_db = None
+_writes_since_prune = 0
+
+class _Fetch:
+    """One YouTube fetch that every session asking for the same video waits on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.segments = None
+        self.error = None
+
+# Videos being fetched right now, so a class opening the same lecture fetches it once
+_fetches = {}
+
+def parse_video_id(url):
+    """Extract the YouTube video ID from a watch, short, embed or youtu.be URL"""
+    url = url.strip()
+    if _VIDEO_ID_PATTERN.match(url):
+        return url
+
+    parsed = urlparse(url if '://' in url else f"https://{url}")
+    host = parsed.netloc.lower()
+    video_id = None
+    if host.endswith('youtu.be'):
+        video_id = parsed.path.lstrip('/').split('/')[0]
+    elif 'youtube.com' in host:
+        if parsed.path == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [None])[0]
+        else:
+            parts = parsed.path.strip('/').split('/')
+            if len(parts) >= 2 and parts[0] in ('embed', 'shorts', 'live', 'v'):
+                video_id = parts[1]
+
+    if not video_id or not _VIDEO_ID_PATTERN.match(video_id):
+        raise ValueError("Could not find a YouTube video ID in the URL")
+    return video_id
+
+def _database():
+    global _db
+    if _db is None:
+        _db = open_database("transcripts.sqlite3")
+        _db.execute(
+            """CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+    return _db
+
+def _pack(segments):
+    """Store segments column-wise: texts plus start and duration in centiseconds"""
+    payload = {
+        "text": [segment['text'] for segment in segments],
+        "start": [round(segment.get('start', 0) * 100) for segment in segments],
+        "duration": [round(segment.get('duration', 0) * 100) for segment in segments]
+    }
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+def _unpack(blob):
+    payload = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return [
+        {"text": text, "start": start / 100, "duration": duration / 100}
+        for text, start, duration in zip(payload['text'], payload['start'], payload['duration'])
+    ]
+
+def _store(video_id, segments):
+    """Write a transcript to disk, dropping old and surplus ones every 100 writes"""
+    global _writes_since_prune
+    try:
+        db = _database()
+        now = time.time()
+        db.execute(
+            "INSERT OR REPLACE INTO transcripts (video_id, payload, fetched_at) VALUES (?, ?, ?)",
+            (video_id, _pack(segments), now)
+        )
+        _writes_since_prune += 1
+        if _writes_since_prune >= 100:
+            _writes_since_prune = 0
+            db.execute("DELETE FROM transcripts WHERE fetched_at < ?", (now - TRANSCRIPT_TTL_SECONDS,))
+            db.execute(
+                """DELETE FROM transcripts WHERE video_id IN (
+                    SELECT video_id FROM transcripts ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (MAX_DISK_TRANSCRIPTS,)
+            )
+    except Exception:
+        pass
+
+def _remember(video_id, segments):
+    _memory[video_id] = segments
+    _memory.move_to_end(video_id)
+    while len(_memory) > MAX_MEMORY_TRANSCRIPTS:
+        _memory.popitem(last=False)
+
+def get_transcript(video_id):
+    """Return transcript segments for a video, fetching from YouTube only on a cache miss.
+
+    Concurrent requests for a video that is not cached yet share a single fetch.
+    """
+    with _lock:
+        if video_id in _memory:
+            _memory.move_to_end(video_id)
+            return _memory[video_id]
+        try:
+            row = _database().execute(
+                "SELECT payload, fetched_at FROM transcripts WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        except Exception:
+            row = None
+        if row and time.time() - row[1] < TRANSCRIPT_TTL_SECONDS:
+            segments = _unpack(row[0])
+            _remember(video_id, segments)
+            return segments
+
+        fetch = _fetches.get(video_id)
+        leader = fetch is None
+        if leader:
+            fetch = _fetches[video_id] = _Fetch()
+
+    if not leader:
+        fetch.done.wait()
+        if fetch.error is not None:
+            raise fetch.error
+        return fetch.segments
+
+    try:
+        # Imported on a cache miss only, so cached lectures never load the client
+        from youtube_transcript_api import YouTubeTranscriptApi
+        fetch.segments = YouTubeTranscriptApi.get_transcript(video_id)
+        with _lock:
+            _remember(video_id, fetch.segments)
+            _store(video_id, fetch.segments)
+    except Exception as e:
+        fetch.error = e
+        raise
+    finally:
+        with _lock:
+            del _fetches[video_id]
+        fetch.done.set()
+    return fetch.segments
+
+def transcript_to_text(segments):
+    """Join transcript segments into plain text"""
+    return " ".join(segment['text'] for segment in segments)
+
+def format_timestamp(seconds):
+    """Format seconds as H:MM:SS or M:SS"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def timestamp_url(video_id, seconds):
+    """Deep link into a video at the given second"""
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(seconds)}s"
+
+def group_into_chapters(segments, chapter_seconds=300, max_chars=12000):
+    """Group consecutive segments into time-based chapters.
+
+    A chapter closes once it spans chapter_seconds or its text reaches max_chars,
+    whichever comes first. Each chapter keeps its start and end time.
+    """
+    chapters, current = [], []
+    for segment in segments:
+        if current:
+            spans = segment['start'] - current[0]['start'] >= chapter_seconds
+            too_long = sum(len(item['text']) + 1 for item in current) >= max_chars
+            if spans or too_long:
+                chapters.append(current)
+                current = []
+        current.append(segment)
+    if current:
+        chapters.append(current)
+
+    return [
+        {
+            "start": chapter[0]['start'],
+            "end": chapter[-1]['start'] + chapter[-1].get('duration', 0),
+            "text": transcript_to_text(chapter)
+        }
+        for chapter in chapters
+    ]
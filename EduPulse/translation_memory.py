@@ -0,0 +1,206 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from storage import open_database
+from utils import run_watson_granite_batch
+
+# Number of segments sent to the model in one numbered translation request
+SEGMENTS_PER_REQUEST = 20
+
+# Number of translated segments kept in memory for the whole server
+MAX_MEMORY_SEGMENTS = 5000
+
+# Segments kept on disk and how long before a segment is translated again
+MAX_DISK_SEGMENTS = int(os.getenv('EDUPULSE_TRANSLATION_DISK_SEGMENTS', '200000'))
+TRANSLATION_TTL_SECONDS = float(os.getenv('EDUPULSE_TRANSLATION_TTL_DAYS', '30')) * 24 * 3600
+
+# Sentence ends (including CJK punctuation) and line breaks; the separators are kept
+_SEGMENT_SPLIT = re.compile(r'((?<=[.!?。！？])\s+|\n+)')
+_NUMBERED_LINE = re.compile(r'^\s*(\d+)[.)]\s*(.*)$')
+
+def split_segments(text):
+    """Split text into alternating sentence segments and the whitespace between them"""
+    return [part for part in _SEGMENT_SPLIT.split(text) if part]
+
+def normalize_segment(segment):
+    return " ".join(segment.split())
+
+class TranslationMemory:
+    """Sentence-level translations keyed by language pair, in memory and in SQLite"""
+
+    def __init__(self, db_name="translation_memory.sqlite3", max_disk_segments=MAX_DISK_SEGMENTS,
+                 ttl_seconds=TRANSLATION_TTL_SECONDS):
+        self.db_name = db_name
+        self.max_disk_segments = max_disk_segments
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._db = None
+        self._writes_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _database(self):
+        if self._db is None:
+            self._db = open_database(self.db_name)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS segments (
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    segment TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (source, target, segment)
+                )"""
+            )
+        return self._db
+
+    def _remember(self, key, translation):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > MAX_MEMORY_SEGMENTS:
+            self._memory.popitem(last=False)
+
+    def lookup(self, source, target, segments):
+        """Return a dict of the normalized segments that already have a translation"""
+        found = {}
+        with self._lock:
+            for segment in segments:
+                key = (source, target, segment)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[segment] = self._memory[key]
+            missing = [segment for segment in segments if segment not in found]
+            if missing:
+                try:
+                    db = self._database()
+                    cutoff = time.time() - self.ttl_seconds
+                    for segment in missing:
+                        row = db.execute(
+                            "SELECT translation FROM segments WHERE source = ? AND target = ? AND segment = ? "
+                            "AND created_at >= ?",
+                            (source, target, segment, cutoff)
+                        ).fetchone()
+                        if row:
+                            found[segment] = row[0]
+                            self._remember((source, target, segment), row[0])
+                except Exception:
+                    pass
+            self.hits += len(found)
+            self.misses += len(segments) - len(found)
+        return found
+
+    def store(self, source, target, translations):
+        """Save new segment translations, dropping old and surplus ones every 100 writes"""
+        now = time.time()
+        with self._lock:
+            for segment, translation in translations.items():
+                self._remember((source, target, segment), translation)
+            try:
+                db = self._database()
+                db.executemany(
+                    "INSERT OR REPLACE INTO segments (source, target, segment, translation, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(source, target, segment, translation, now) for segment, translation in translations.items()]
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune(db, now)
+            except Exception:
+                pass
+
+    def _prune(self, db, now):
+        """Drop expired segments and the oldest ones above the size limit"""
+        self._writes_since_prune = 0
+        db.execute("DELETE FROM segments WHERE created_at < ?", (now - self.ttl_seconds,))
+        db.execute(
+            """DELETE FROM segments WHERE rowid IN (
+                SELECT rowid FROM segments ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_disk_segments,)
+        )
+
+    def stats(self):
+        """Return segment hit and miss counters"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_segments": len(self._memory)}
+
+translation_memory = TranslationMemory()
+
+def _numbered_prompt(segments, source, target):
+    lines = "\n".join(f"{index}. {segment}" for index, segment in enumerate(segments, start=1))
+    return f"""Translate each numbered line from {source} to {target}.
+    Keep the numbering and return exactly {len(segments)} numbered lines, one translation per line,
+    without any explanations.
+
+    {lines}"""
+
+def _parse_numbered(response, count):
+    """Read back a numbered list of translations, or None if it does not line up"""
+    translations = {}
+    for line in response.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match:
+            translations[int(match.group(1))] = match.group(2).strip()
+    if sorted(translations) != list(range(1, count + 1)):
+        return None
+    return [translations[index] for index in range(1, count + 1)]
+
+def _translate_segments(segments, source, target):
+    """Translate new segments in parallel groups, one numbered request per group"""
+    groups = [segments[i:i + SEGMENTS_PER_REQUEST] for i in range(0, len(segments), SEGMENTS_PER_REQUEST)]
+    responses = run_watson_granite_batch(
+        [_numbered_prompt(group, source, target) for group in groups],
+        profile="translation"
+    )
+
+    translations, retry = {}, []
+    for group, response in zip(groups, responses):
+        if response.startswith("Error"):
+            return response
+        parsed = _parse_numbered(response, len(group))
+        if parsed is None:
+            retry.extend(group)
+        else:
+            translations.update(zip(group, parsed))
+
+    # Groups the model did not number back correctly are translated one segment at a time
+    if retry:
+        single = run_watson_granite_batch([
+            f"""Translate the following text from {source} to {target}:
+
+            Text: {segment}
+
+            Provide only the {target} translation without any explanations."""
+            for segment in retry
+        ], profile="translation")
+        for segment, response in zip(retry, single):
+            if response.startswith("Error"):
+                return response
+            translations[segment] = response.strip()
+    return translations
+
+def translate_text(text, source, target):
+    """Translate text, reusing stored translations of sentences seen before"""
+    parts = split_segments(text)
+    segments = list(dict.fromkeys(
+        normalize_segment(part) for part in parts if part.strip()
+    ))
+    if not segments:
+        return text
+
+    translations = translation_memory.lookup(source, target, segments)
+    missing = [segment for segment in segments if segment not in translations]
+    if missing:
+        new_translations = _translate_segments(missing, source, target)
+        if isinstance(new_translations, str):
+            return new_translations
+        translation_memory.store(source, target, new_translations)
+        translations.update(new_translations)
+
+    return "".join(
+        translations[normalize_segment(part)] if part.strip() else part
+        for part in parts
+    )
@@ -1,19 +1,101 @@
 import streamlit as st
 
-from ibm_watsonx_ai import Credentials
-from ibm_watsonx_ai.foundation_models import ModelInference
-from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
-from ibm_watsonx_ai.foundation_models.utils.enums import ModelTypes, DecodingMethods
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import json
 
-# Load environment variables
-load_dotenv('.streamlit/secrets.toml')
+# ibm_watsonx_ai and httpx take about a second to import, so they are imported in
+# init_watsonx on the first model call instead of by every page that imports utils.
+from llm_cache import make_cache_key, response_cache
+from resilience import call_with_resilience, stream_with_resilience
+from backends import RecordingBackend, mock_backend_from_env, replay_backend_from_env
+from metrics import LLMRequestTimer, record_llm_tokens
+from scheduler import listen_queue, queue_listener, session_context
+from jobs import job_queue
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+MODEL_ID = "ibm/granite-3-8b-instruct"
+
+# Model backend: "watsonx", "mock" for a deterministic local stand-in that needs
+# no credentials, or "replay" to serve a recorded fixture (see backends.py)
+LLM_BACKEND = os.getenv('EDUPULSE_LLM_BACKEND', 'watsonx')
+
+# Set EDUPULSE_RECORD_PATH to append every model request to a fixture for replay
+RECORD_PATH = os.getenv('EDUPULSE_RECORD_PATH')
+
+# Size of the keep-alive HTTP connection pool shared by every session
+HTTP_POOL_SIZE = int(os.getenv('EDUPULSE_HTTP_POOL_SIZE', '20'))
+
+def _profile(max_new_tokens, min_new_tokens=10, stop_sequences=None, repetition_penalty=None):
+    """Build generation parameters for one task profile"""
+    # Plain names of the GenTextParamsMetaNames fields, so the SDK is not needed here
+    params = {
+        "decoding_method": "greedy",
+        "temperature": 0.7,
+        "min_new_tokens": min_new_tokens,
+        "max_new_tokens": max_new_tokens
+    }
+    if stop_sequences:
+        params["stop_sequences"] = stop_sequences
+    if repetition_penalty:
+        params["repetition_penalty"] = repetition_penalty
+    return params
+
+# Generation settings per task. Pages pick one with run_watson_granite(..., profile=...)
+# so short answers stop early instead of sharing one 2048-token limit.
+GENERATION_PROFILES = {
+    "default": _profile(2048),
+    "learning": _profile(1200),
+    "code_format": _profile(1500, min_new_tokens=1),
+    "code_review": _profile(1500),
+    "summary": _profile(1200),
+    "section_summary": _profile(600),
+    "chapter_summary": _profile(400),
+    "study_plan": _profile(1800),
+    "answer": _profile(1024),
+    "support": _profile(350, repetition_penalty=1.05),
+    "guidance": _profile(700, repetition_penalty=1.05),
+    "translation": _profile(1024, min_new_tokens=1, stop_sequences=["\n\nNote:", "\n\n(Note"]),
+    "vocabulary": _profile(900),
+    "study_resource": _profile(2048)
+}
+
+GEN_PARAMS = GENERATION_PROFILES["default"]
+
+# Long generations wait in the scheduler's bulk lane, behind interactive answers
+BULK_PROFILES = {"summary", "section_summary", "chapter_summary", "study_plan", "study_resource"}
+
+def get_profile_lane(profile):
+    return "bulk" if profile in BULK_PROFILES else "interactive"
+
+# Set EDUPULSE_LLM_CACHE=0 to always call the model
+CACHE_ENABLED = os.getenv('EDUPULSE_LLM_CACHE', '1') != '0'
+
+# Default number of parallel requests for batch calls
+MAX_CONCURRENCY = int(os.getenv('EDUPULSE_MAX_CONCURRENCY', '4'))
+
+# How often a page refreshes the partial output of its background jobs
+JOB_POLL_SECONDS = float(os.getenv('EDUPULSE_JOB_POLL_SECONDS', '0.5'))
+
+# Shared WatsonX client. Built once per server process and reused by every
+# session, so the IAM token and the pooled HTTP connections are kept between calls.
+_watsonx_lock = threading.Lock()
+_watsonx_model = None
 
 def init_watsonx():
     """Initialize WatsonX credentials and return model inference object"""
     try:
+        from ibm_watsonx_ai import APIClient, Credentials
+        from ibm_watsonx_ai.foundation_models import ModelInference
+        from ibm_watsonx_ai.utils.utils import HttpClientConfig
+        from httpx import Limits
+
+        # Credentials are only needed here, so the secrets file is read on first use
+        load_dotenv('.streamlit/secrets.toml')
         api_key = os.getenv('WATSONX_APIKEY')
         project_id = os.getenv('WATSONX_PROJECT_ID')
         url = os.getenv('WATSONX_URL')
@@ -21,47 +103,401 @@ def init_watsonx():
         if not all([api_key, project_id, url]):
             raise ValueError("Missing required WatsonX credentials")
 
-        gen_params = {
-            GenParams.DECODING_METHOD: DecodingMethods.GREEDY,
-            GenParams.TEMPERATURE: 0.7,
-            GenParams.MIN_NEW_TOKENS: 10,
-            GenParams.MAX_NEW_TOKENS: 2048
-        }
-
-        return ModelInference(
-            model_id="ibm/granite-3-8b-instruct",
-            params=gen_params,
+        # The APIClient caches the IAM token and refreshes it only when it expires
+        api_client = APIClient(
             credentials=Credentials(
                 api_key=api_key,
                 url=url
             ),
-            project_id=project_id
+            project_id=project_id,
+            httpx_client=HttpClientConfig(
+                limits=Limits(
+                    max_connections=HTTP_POOL_SIZE,
+                    max_keepalive_connections=HTTP_POOL_SIZE,
+                    keepalive_expiry=60
+                )
+            )
+        )
+
+        # Retries are handled by resilience.py, so the SDK's own retry loop is
+        # turned off to keep the two from multiplying
+        return ModelInference(
+            model_id=MODEL_ID,
+            params=GEN_PARAMS,
+            api_client=api_client,
+            max_retries=0
         )
     except Exception as e:
         st.error(f"Error initializing WatsonX: {str(e)}")
         return None
 
-def run_watson_granite(prompt, system_prompt=""):
-    """Run WatsonX model with error handling"""
+def init_backend():
+    """Return the model object of the configured backend"""
+    if LLM_BACKEND == "mock":
+        backend = mock_backend_from_env()
+    elif LLM_BACKEND == "replay":
+        try:
+            backend = replay_backend_from_env()
+        except Exception as e:
+            st.error(f"Error loading replay fixture: {str(e)}")
+            return None
+    elif LLM_BACKEND == "watsonx":
+        backend = init_watsonx()
+    else:
+        st.error(f"Unknown model backend: {LLM_BACKEND}")
+        return None
+
+    if backend and RECORD_PATH:
+        return RecordingBackend(backend, RECORD_PATH)
+    return backend
+
+def get_watsonx_model():
+    """Return the shared model inference object, creating it on first use"""
+    global _watsonx_model
+    if _watsonx_model is None:
+        with _watsonx_lock:
+            if _watsonx_model is None:
+                _watsonx_model = init_backend()
+    return _watsonx_model
+
+def reset_watsonx_model():
+    """Drop the shared client so the next call authenticates again"""
+    global _watsonx_model
+    with _watsonx_lock:
+        _watsonx_model = None
+
+def _is_auth_error(error):
+    """Check whether an exception was caused by rejected or expired credentials"""
+    status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status_code in (401, 403)
+
+def estimate_tokens(text):
+    """Rough token count for budgeting prompts (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to roughly max_tokens, ending on a word boundary"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4]
+    if ' ' in cut:
+        cut = cut[:cut.rindex(' ')]
+    return cut.rstrip() + " …"
+
+def _build_prompt(prompt, system_prompt=""):
+    """Combine the system prompt and the user prompt into one model input"""
+    return f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+
+def get_profile_params(profile):
+    """Return the generation parameters of a named profile"""
+    if profile not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile: {profile}")
+    return GENERATION_PROFILES[profile]
+
+# Actual token use per profile, for tuning the limits above
+_usage_lock = threading.Lock()
+_profile_usage = {}
+
+def _record_usage(profile, result):
+    """Add the token counts of one model result to the profile totals"""
+    with _usage_lock:
+        usage = _profile_usage.setdefault(profile, {
+            "calls": 0, "input_tokens": 0, "output_tokens": 0, "max_output_tokens": 0, "stopped_at_limit": 0
+        })
+        output_tokens = result.get('generated_token_count') or 0
+        usage["calls"] += 1
+        usage["input_tokens"] += result.get('input_token_count') or 0
+        usage["output_tokens"] += output_tokens
+        usage["max_output_tokens"] = max(usage["max_output_tokens"], output_tokens)
+        if result.get('stop_reason') == 'max_tokens':
+            usage["stopped_at_limit"] += 1
+    record_llm_tokens(profile, result.get('input_token_count') or 0, output_tokens)
+
+def get_profile_usage():
+    """Return token use per generation profile"""
+    with _usage_lock:
+        return {profile: dict(usage) for profile, usage in _profile_usage.items()}
+
+def _request_key(complete_prompt, params):
+    """Key identifying a request by model, parameters and normalized prompt"""
+    # Mock answers must never be served in place of real ones
+    model = MODEL_ID if LLM_BACKEND == "watsonx" else f"{LLM_BACKEND}/{MODEL_ID}"
+    return make_cache_key(model, params, complete_prompt)
+
+def get_cache_stats():
+    """Return hit and miss counters of the response cache"""
+    return response_cache.stats()
+
+class _Flight:
+    """One upstream generation shared by every caller that sends the same request.
+
+    The generation runs on its own thread, so a page that stops reading (a rerun,
+    a closed tab) never interrupts it for the other callers following it.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.chunks = []
+        self.done = False
+        self.error = None
+        # Queue position of the upstream call while it waits for a slot
+        self.position = None
+
+    def publish(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def report_position(self, position):
+        with self.condition:
+            self.position = position
+            self.condition.notify_all()
+
+    def follow(self, listener=None):
+        """Yield the chunks as they arrive, then raise the error if the generation failed.
+
+        listener is called with the queue position while the upstream call waits for a slot.
+        """
+        index = 0
+        reported = None
+        while True:
+            with self.condition:
+                while index >= len(self.chunks) and not self.done and self.position == reported:
+                    self.condition.wait()
+                new_chunks = self.chunks[index:]
+                index = len(self.chunks)
+                done, error, position = self.done, self.error, self.position
+            if position != reported:
+                reported = position
+                if listener is not None:
+                    listener(position)
+            yield from new_chunks
+            if done:
+                if error:
+                    raise error
+                return
+
+# Requests currently being generated, so identical concurrent requests share one call
+_flights_lock = threading.Lock()
+_flights = {}
+_coalesced_requests = 0
+
+def _join_flight(key):
+    """Return the in-flight generation for a key and whether the caller must run it"""
+    global _coalesced_requests
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight:
+            _coalesced_requests += 1
+            return flight, False
+        flight = _flights[key] = _Flight()
+        return flight, True
+
+def _leave_flight(key, flight):
+    with _flights_lock:
+        if _flights.get(key) is flight:
+            del _flights[key]
+
+def _run_flight(key, flight, generate):
+    """Run the upstream generation of a flight and publish its chunks to every follower"""
     try:
-        model_inference = init_watsonx()
+        with listen_queue(flight.report_position):
+            for chunk in generate():
+                flight.publish(chunk)
+        # Only complete generations are cached, before leaving the flight so late arrivals find them
+        if CACHE_ENABLED and flight.chunks:
+            response_cache.set(key, "".join(flight.chunks))
+        _leave_flight(key, flight)
+        flight.finish()
+    except Exception as e:
+        _leave_flight(key, flight)
+        flight.finish(e)
+
+def _start_flight(key, generate):
+    """Return the in-flight generation for a key, starting one if there is none.
+
+    The second value is True if this call started it. Callers only follow the
+    flight, so any of them may stop reading without affecting the others.
+    """
+    flight, leader = _join_flight(key)
+    if leader:
+        # The thread keeps the caller's context for metrics and the session's fair share
+        context = session_context()
+        threading.Thread(
+            target=context.run, args=(_run_flight, key, flight, generate), name="edupulse-flight", daemon=True
+        ).start()
+    return flight, leader
+
+def get_coalescing_stats():
+    """Return how many requests joined an identical in-flight request"""
+    with _flights_lock:
+        return {"in_flight": len(_flights), "coalesced": _coalesced_requests}
+
+def _generate_text(complete_prompt, params, profile):
+    """Call WatsonX once and return the generated text"""
+    model_inference = get_watsonx_model()
+    if not model_inference:
+        raise RuntimeError("Could not initialize WatsonX model")
+
+    try:
+        response = call_with_resilience(
+            lambda: model_inference.generate(complete_prompt, params=params), lane=get_profile_lane(profile)
+        )
+    except Exception as e:
+        if not _is_auth_error(e):
+            raise
+        # Credentials were revoked or rotated; rebuild the client once and retry
+        reset_watsonx_model()
+        model_inference = get_watsonx_model()
         if not model_inference:
-            return "Error: Could not initialize WatsonX model"
+            raise RuntimeError("Could not initialize WatsonX model")
+        response = call_with_resilience(
+            lambda: model_inference.generate(complete_prompt, params=params), lane=get_profile_lane(profile)
+        )
+
+    if not response or 'results' not in response:
+        raise ValueError("Invalid response from WatsonX")
 
-        complete_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-        response = model_inference.generate(complete_prompt)
-        
-        if not response or 'results' not in response:
-            raise ValueError("Invalid response from WatsonX")
+    if response['results']:
+        _record_usage(profile, response['results'][0])
+    generated_texts = [item.get('generated_text', '') for item in response['results']]
+    return generated_texts[0] if generated_texts else ""
 
-        generated_texts = [item.get('generated_text', '') for item in response['results']]
-        return generated_texts[0] if generated_texts else "No response generated"
+def run_watson_granite(prompt, system_prompt="", profile="default"):
+    """Run WatsonX model with error handling"""
+    request = LLMRequestTimer(profile)
+    try:
+        params = get_profile_params(profile)
+        complete_prompt = _build_prompt(prompt, system_prompt)
+        key = _request_key(complete_prompt, params)
+        if CACHE_ENABLED:
+            cached = response_cache.get(key)
+            if cached is not None:
+                request.finish("cache_hit")
+                return cached
+
+        def generate():
+            text = _generate_text(complete_prompt, params, profile)
+            if text:
+                yield text
+
+        flight, leader = _start_flight(key, generate)
+        with _queue_notice():
+            text = "".join(flight.follow(queue_listener()))
+        request.finish("ok" if leader else "coalesced")
+        return text or "No response generated"
 
     except Exception as e:
+        request.finish("error")
         return f"Error: {str(e)}"
+
+def run_watson_granite_batch(prompts, system_prompt="", max_concurrency=MAX_CONCURRENCY, profile="default"):
+    """Run several prompts in parallel and return the responses in the same order.
+
+    Each item is either a prompt string or a (prompt, system_prompt) tuple. A failed
+    item comes back as an "Error: ..." string without affecting the others.
+    """
+    items = [item if isinstance(item, tuple) else (item, system_prompt) for item in prompts]
+    if not items:
+        return []
+    if len(items) == 1:
+        return [run_watson_granite(*items[0], profile=profile)]
+
+    # Each worker runs in a copy of the caller's context, so metrics keep the page's
+    # feature and the scheduler still knows which session the work belongs to
+    contexts = [session_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(items)))) as executor:
+        return list(executor.map(
+            lambda item, context: context.run(run_watson_granite, *item, profile=profile),
+            items, contexts
+        ))
+
+def _stream_chunks(model_inference, complete_prompt, params, results):
+    """Yield text chunks from a raw WatsonX stream, keeping the last result for token counts"""
+    for response in model_inference.generate_text_stream(complete_prompt, params=params, raw_response=True):
+        for result in response.get('results', []):
+            results.append(result)
+            if result.get('generated_text'):
+                yield result['generated_text']
+
+def _stream_text(complete_prompt, params, profile):
+    """Yield text chunks from one WatsonX streaming call"""
+    model_inference = get_watsonx_model()
+    if not model_inference:
+        raise RuntimeError("Could not initialize WatsonX model")
+
+    lane = get_profile_lane(profile)
+    results = []
+    received = False
+    try:
+        for chunk in stream_with_resilience(
+                lambda: _stream_chunks(model_inference, complete_prompt, params, results), lane=lane):
+            received = True
+            yield chunk
+    except Exception as e:
+        if received or not _is_auth_error(e):
+            raise
+        # Nothing was sent to the page yet, so it is safe to re-authenticate and retry
+        reset_watsonx_model()
+        model_inference = get_watsonx_model()
+        if not model_inference:
+            raise RuntimeError("Could not initialize WatsonX model")
+        yield from stream_with_resilience(
+            lambda: _stream_chunks(model_inference, complete_prompt, params, results), lane=lane)
+
+    if results:
+        # Token counts are cumulative; the input count is only sent with the first event
+        final = dict(results[-1])
+        final['input_token_count'] = max(result.get('input_token_count') or 0 for result in results)
+        _record_usage(profile, final)
+
+def generate_stream(prompt, system_prompt="", profile="default"):
+    """Yield generated text chunks from WatsonX, raising on failure"""
+    request = LLMRequestTimer(profile)
+    try:
+        for chunk in _stream_response(prompt, system_prompt, profile, request):
+            request.first_chunk()
+            yield chunk
+    except Exception:
+        request.finish("error")
+        raise
     finally:
-        if 'model_inference' in locals():
-            del model_inference
+        # Only reached without an outcome when the page stopped reading
+        request.finish("interrupted")
+
+def _stream_response(prompt, system_prompt, profile, request):
+    """Yield chunks from the cache, a coalesced request or a new WatsonX stream"""
+    params = get_profile_params(profile)
+    complete_prompt = _build_prompt(prompt, system_prompt)
+    key = _request_key(complete_prompt, params)
+    if CACHE_ENABLED:
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield cached
+            request.finish("cache_hit")
+            return
+
+    flight, leader = _start_flight(key, lambda: _stream_text(complete_prompt, params, profile))
+    # Whoever started it, the stream is read from the flight; stopping here leaves it running for the others
+    yield from flight.follow(queue_listener())
+    request.finish("ok" if leader else "coalesced")
+
+def submit_generation(prompt, system_prompt="", profile="default", label="generation"):
+    """Start a streamed model call as a background job and return the job ID"""
+    return job_queue.submit(generate_stream, prompt, system_prompt, profile, label=label)
+
+def run_watson_granite_stream(prompt, system_prompt="", profile="default"):
+    """Run WatsonX model and yield the generated text as it arrives"""
+    try:
+        yield from generate_stream(prompt, system_prompt, profile)
+    except Exception as e:
+        yield f"Error: {str(e)}"
 
 # UI Components
 def load_css():
@@ -130,6 +566,80 @@ def load_css():
     </style>
     """
 
+def render_watson_stream(prompt, system_prompt="", profile="default"):
+    """Stream a WatsonX response into the page and return the full text"""
+    errors = []
+
+    def chunks():
+        try:
+            yield from generate_stream(prompt, system_prompt, profile)
+        except Exception as e:
+            errors.append(e)
+
+    with _queue_notice():
+        text = st.write_stream(chunks())
+    if errors:
+        return f"Error: {str(errors[0])}"
+    return text or "No response generated"
+
+@contextmanager
+def _queue_notice():
+    """Show the student their place in line while a request made by the page waits for a slot"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        yield
+        return
+    placeholder = []
+
+    def show(position):
+        if position is None:
+            if placeholder:
+                placeholder[0].empty()
+            return
+        if not placeholder:
+            placeholder.append(st.empty())
+        placeholder[0].info(f"⏳ The AI service is busy. {_ahead(position)}, thanks for waiting...")
+
+    with listen_queue(show):
+        yield
+
+def _ahead(position):
+    return "You are next" if position == 0 else f"{position} request{'s' if position != 1 else ''} ahead of you"
+
+def _render_job(placeholder, job, message):
+    with placeholder.container():
+        if job.state != "running":
+            st.info(f"⏳ {message} (queued)")
+        elif job.queue_position is not None:
+            st.info(f"⏳ {message} Waiting for the AI service: {_ahead(job.queue_position)}.")
+        else:
+            st.info(f"⏳ {message} ({job.elapsed():.0f}s)")
+        text = job.text()
+        if text:
+            st.markdown(text)
+
+def show_job(job_id, message="Generating..."):
+    """Show a running background job; follow_jobs keeps its output up to date"""
+    placeholder = st.empty()
+    job = job_queue.get(job_id)
+    if job is not None:
+        _render_job(placeholder, job, message)
+    return placeholder, job_id, message
+
+def follow_jobs(watched):
+    """Refresh the jobs shown with show_job until one finishes, then rerun the page.
+
+    Call this at the end of the page. Any widget interaction interrupts the wait with
+    a normal rerun, and the jobs keep running in the background meanwhile.
+    """
+    while watched:
+        time.sleep(JOB_POLL_SECONDS)
+        for placeholder, job_id, message in watched:
+            job = job_queue.get(job_id)
+            if job is None or job.finished:
+                st.rerun()
+                return
+            _render_job(placeholder, job, message)
+
 def show_error(message):
     st.error(f"🚨 {message}")
 
@@ -140,4 +650,10 @@ def show_info(message):
     st.info(f"ℹ️ {message}")
 
 def show_warning(message):
-    st.warning(f"⚠️ {message}")
\ No newline at end of file
+    st.warning(f"⚠️ {message}")
+
+# Opt-in warm-up (EDUPULSE_WARMUP=1): every page imports utils, so the first script
+# run in the server process starts authenticating and filling the cache in the background
+if os.getenv('EDUPULSE_WARMUP', '0') == '1':
+    from warmup import start_warmup
+    start_warmup()
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+from utils import CACHE_ENABLED, get_watsonx_model, run_watson_granite_batch
+from metrics import feature_scope
+from qa_index import question_index
+from prompts import (
+    EXAMPLE_QUESTIONS, SUPPORT_TOPICS, VOCABULARY_TOPICS,
+    example_question_prompt, guidance_prompt, vocabulary_prompt
+)
+
+# Vocabulary lists depend on the output language; English is the page's default
+WARMUP_LANGUAGES = [
+    language.strip() for language in os.getenv('EDUPULSE_WARMUP_LANGUAGES', 'English').split(',')
+    if language.strip()
+]
+
+_status_lock = threading.Lock()
+_status = {"state": "not started", "prompts": 0, "failed": 0, "client_s": None, "total_s": None, "error": None}
+_thread = None
+
+def _update_status(**changes):
+    with _status_lock:
+        _status.update(changes)
+
+def get_warmup_status():
+    with _status_lock:
+        return dict(_status)
+
+def warmup_groups():
+    """Static prompts to pre-generate, grouped by the generation profile their page uses"""
+    return [
+        ("answer", [example_question_prompt(question) for question in EXAMPLE_QUESTIONS]),
+        ("guidance", [guidance_prompt(topic) for topic in SUPPORT_TOPICS]),
+        ("vocabulary", [
+            vocabulary_prompt(topic, language) for language in WARMUP_LANGUAGES for topic in VOCABULARY_TOPICS
+        ])
+    ]
+
+def run_warmup():
+    """Build the model client, fetch its token and pre-generate the static prompts"""
+    started_at = time.perf_counter()
+    _update_status(state="running", error=None)
+    try:
+        model = get_watsonx_model()
+        if model is None:
+            raise RuntimeError("the model client could not be created")
+        # Fetch the IAM token now instead of during the first student's request
+        api_client = getattr(model, '_client', None)
+        if api_client is not None:
+            api_client.token
+        _update_status(client_s=time.perf_counter() - started_at)
+
+        if not CACHE_ENABLED:
+            _update_status(state="done", total_s=time.perf_counter() - started_at)
+            return
+
+        for profile, prompts in warmup_groups():
+            # Counted apart from the pages, so their metrics only show student traffic
+            with feature_scope("warmup"):
+                answers = run_watson_granite_batch(prompts, profile=profile)
+            failed = sum(1 for answer in answers if answer.startswith("Error"))
+            with _status_lock:
+                _status["prompts"] += len(prompts)
+                _status["failed"] += failed
+            if profile == "answer":
+                # The Q&A page looks up its answer index before the response cache
+                for question, answer in zip(EXAMPLE_QUESTIONS, answers):
+                    if not answer.startswith("Error"):
+                        question_index.add(question, answer)
+
+        _update_status(state="done", total_s=time.perf_counter() - started_at)
+    except Exception as e:
+        _update_status(state="failed", error=str(e), total_s=time.perf_counter() - started_at)
+
+def start_warmup():
+    """Run the warm-up in a background thread, once per server process"""
+    global _thread
+    with _status_lock:
+        if _thread is not None:
+            return _thread
+        _thread = threading.Thread(target=run_warmup, name="edupulse-warmup", daemon=True)
+        _status["state"] = "starting"
+    _thread.start()
+    return _thread